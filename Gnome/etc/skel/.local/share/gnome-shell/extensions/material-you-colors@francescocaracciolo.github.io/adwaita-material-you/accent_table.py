@@ -0,0 +1,120 @@
+import glob
+import hashlib
+import importlib.metadata
+import json
+import os
+from map_colors import MappingPlan, mapped_preset
+from json_cache import load_json, thaw
+from output_writer import write_atomic
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+TABLE_FILE = os.path.join(DATA_DIR, "accent_schemes.json")
+# Files the table is generated from, editing one of them invalidates it
+INPUT_FILES = ["color_mappings.json", "base_presets.json"]
+# Sources the colors are computed with, the bundled port of
+# material_color_utilities and the mapping of its roles
+SOURCE_PATTERNS = ["material_color_utilities_python/**/*.py", "map_colors.py"]
+# Bump when the format of the table changes, older tables are ignored
+TABLE_VERSION = 1
+
+def inputs_fingerprint(backend: str, data_dir: str = DATA_DIR) -> str:
+    """Fingerprint of what the table depends on
+
+    The backend with the version of materialyoucolor when it is the one used,
+    the content of the input files and the sources of the bundled solver and
+    schemes, so upgrading either of them generates the table again.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(backend.encode("utf-8"))
+    if backend == "materialyoucolor":
+        try:
+            digest.update(importlib.metadata.version("materialyoucolor").encode("utf-8"))
+        except importlib.metadata.PackageNotFoundError:
+            pass
+    for name in INPUT_FILES:
+        with open(os.path.join(data_dir, name), "rb") as f:
+            digest.update(f.read())
+    for pattern in SOURCE_PATTERNS:
+        for path in sorted(glob.glob(os.path.join(data_dir, pattern), recursive=True)):
+            digest.update(os.path.relpath(path, data_dir).encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return str(TABLE_VERSION) + "|" + digest.hexdigest()
+
+def entry_key(color: int, variant: str, scheme: str) -> str:
+    return str(int(color)) + "|" + variant + "|" + scheme
+
+class AccentTable:
+    """Mapped presets of the fixed GNOME accent colors, precomputed at install time
+
+    The accent colors offered by GNOME are a fixed list, so the scheme of each
+    one, light and dark, mapped through every variant of color_mappings.json,
+    is generated once by install.sh. Switching to one of them then only reads
+    the table.
+
+    Entries hold the mapped variables only, the rest of the preset is stored
+    once per light/dark scheme.
+    """
+    def __init__(self, path: str = TABLE_FILE):
+        self.path = path
+        self.table = None
+
+    def load(self, fingerprint: str) -> dict:
+        """The table, or an empty one when it is missing or was generated from other inputs"""
+        if self.table is None:
+            try:
+                with open(self.path, "r") as f:
+                    table = json.load(f)
+                if table.get("fingerprint") != fingerprint:
+                    table = {}
+            except (OSError, ValueError, AttributeError):
+                table = {}
+            self.table = table
+        return self.table
+
+    def get(self, fingerprint: str, color: int, variant: str, scheme: str):
+        """Mapped preset of an accent color, or None on a miss"""
+        table = self.load(fingerprint)
+        variables = table.get("entries", {}).get(entry_key(color, variant, scheme))
+        if variables is None:
+            return None
+        return mapped_preset(table["base_presets"][scheme], variables)
+
+    @staticmethod
+    def generate(theme_for_color, fingerprint: str, colors, color_mappings: dict, base_presets: dict) -> dict:
+        """Maps every color through every variant
+
+        theme_for_color(color, is_dark, roles) returns the theme of a color,
+        as used by apply_theme.
+        """
+        entries = {}
+        for scheme in base_presets:
+            plans = {variant: MappingPlan.compile(color_mappings[variant][scheme]) for variant in color_mappings}
+            roles = set()
+            for plan in plans.values():
+                roles.update(plan.slots)
+            schemes = [theme_for_color(color, scheme == "dark", roles)["schemes"][scheme].props for color in colors]
+            for variant, plan in plans.items():
+                for color, scheme_colors in zip(colors, schemes):
+                    entries[entry_key(color, variant, scheme)] = plan.apply(scheme_colors)
+        return {"fingerprint": fingerprint, "base_presets": base_presets, "entries": entries}
+
+    def save(self, table: dict):
+        # Write to a temporary file and rename it, so a running extension
+        # never reads a half-written table
+        write_atomic(self.path, json.dumps(table).encode("utf-8"))
+        self.table = table
+
+def main():
+    # Imported here, extension_integration reads the table
+    from extension_integration import COLORS, backend_name, theme_from_color
+    color_mappings = load_json(os.path.join(DATA_DIR, "color_mappings.json"))
+    # Stored in the table, which is written as JSON
+    base_presets = thaw(load_json(os.path.join(DATA_DIR, "base_presets.json")))
+    table = AccentTable()
+    colors = sorted(set(COLORS.values()))
+    table.save(AccentTable.generate(theme_from_color, inputs_fingerprint(backend_name()), colors, color_mappings, base_presets))
+    print("Precomputed " + str(len(table.table["entries"])) + " accent color presets")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark of the time GTK takes to parse the full and the trimmed gtk.css
+
+Generates the gtk.css of a color, once with every color of the preset and
+once trimmed to the colors the installed themes reference, then loads each
+one in a GTK CSS provider, as every application does at startup, and reports
+the time the parse took.
+
+Needs PyGObject and GTK 3 or 4.
+
+Run from anywhere: python3 benchmarks/gtk_css_parse.py [--gtk 4] [--repeat 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from css_usage import THEME_STYLESHEETS, scan_stylesheets, stylesheet_paths, toolkit_stylesheet_paths
+from json_cache import load_json
+from map_colors import load_plans, mapped_preset
+from material_color_utilities_python.utils.string_utils import argbFromHex
+from material_color_utilities_python.utils.theme_utils import themeFromSourceColor
+from theme_renderer import gtk_css
+
+DATA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def generate_css(color, scheme, variant, names):
+    plan = load_plans(os.path.join(DATA_DIR, "color_mappings.json"))[variant][scheme]
+    theme = themeFromSourceColor(argbFromHex(color), roles=set(plan.slots))
+    base_preset = mapped_preset(load_json(os.path.join(DATA_DIR, "base_presets.json"))[scheme], plan.apply(theme["schemes"][scheme].props))
+    return gtk_css(base_preset, names)
+
+def load_css(Gtk, css):
+    provider = Gtk.CssProvider()
+    if hasattr(provider, "load_from_string"):
+        provider.load_from_string(css)
+    elif Gtk.get_major_version() == 3:
+        provider.load_from_data(css.encode("utf-8"))
+    else:
+        provider.load_from_data(css, -1)
+
+def time_parse(Gtk, css, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load_css(Gtk, css)
+        times.append(time.perf_counter() - start)
+    return times
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--gtk", help="GTK version of the stand-in application, 3 or 4", default="4")
+    parser.add_argument("--repeat", help="Number of parses of each stylesheet", type=int, default=200)
+    parser.add_argument("--color", help="Hex code of the color to base the theme on", default="#4285f4")
+    parser.add_argument("--scheme", help="light or dark", default="dark")
+    parser.add_argument("--variant", help="Variant of color_mappings.json", default="default")
+    parser.add_argument("--stylesheet", help="Theme stylesheet to scan instead of the installed themes, can be repeated", action="append")
+    args = parser.parse_args()
+
+    paths = stylesheet_paths(args.stylesheet) if args.stylesheet else toolkit_stylesheet_paths(THEME_STYLESHEETS)
+    names = scan_stylesheets(paths) if paths else None
+    if names is None:
+        print("No readable theme stylesheet found, give one with --stylesheet")
+        exit(-1)
+
+    import gi
+    gi.require_version("Gtk", args.gtk + ".0")
+    from gi.repository import Gtk
+
+    full_css = generate_css(args.color, args.scheme, args.variant, None)
+    trimmed_css = generate_css(args.color, args.scheme, args.variant, names)
+    # Warm up, the first provider loads GTK's own resources
+    load_css(Gtk, full_css)
+    full_times = time_parse(Gtk, full_css, args.repeat)
+    trimmed_times = time_parse(Gtk, trimmed_css, args.repeat)
+
+    print("Stylesheets scanned: " + str(len(paths)))
+    print("GTK:                 " + ".".join(str(part) for part in (Gtk.get_major_version(), Gtk.get_minor_version(), Gtk.get_micro_version())))
+    for name, css, times in (("Full:   ", full_css, full_times), ("Trimmed:", trimmed_css, trimmed_times)):
+        print("{} {:4d} colors, {:6d} bytes, median {:.1f} us, min {:.1f} us".format(name, css.count("@define-color"), len(css), statistics.median(times) * 1e6, min(times) * 1e6))
+    print("Speedup:             {:.2f}x".format(statistics.median(full_times) / statistics.median(trimmed_times)))
+
+if __name__ == "__main__":
+    main()
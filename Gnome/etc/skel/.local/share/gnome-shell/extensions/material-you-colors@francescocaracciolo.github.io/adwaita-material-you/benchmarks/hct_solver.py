@@ -0,0 +1,66 @@
+"""Differential benchmark of HctSolver against the binary search it replaced
+
+Solves a grid of hue, chroma and tone with both solvers, then reports the
+time each one took and how far apart their colors are in CAM16-UCS.
+
+Run from anywhere: python3 benchmarks/hct_solver.py [--hue-step 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from material_color_utilities_python.hct.cam16 import Cam16
+from material_color_utilities_python.hct.hct import searchIntInViewingConditions
+from material_color_utilities_python.hct.hct_solver import HctSolver
+from material_color_utilities_python.hct.viewing_conditions import ViewingConditions
+
+# Tones of the tonal palettes, and chromas covering neutral to vivid palettes
+TONES = [0, 4, 6, 10, 12, 17, 20, 22, 24, 30, 40, 50, 60, 70, 80, 87, 90, 92, 94, 95, 96, 98, 99, 100]
+CHROMAS = [4, 8, 16, 24, 36, 48, 72, 120]
+
+def solve_all(solve, grid):
+    start = time.perf_counter()
+    colors = [solve(hue, chroma, tone) for hue, chroma, tone in grid]
+    return colors, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hue-step", help="Step between the hues of the grid, in degrees", type=float, default=10.0)
+    args = parser.parse_args()
+
+    hues = [i * args.hue_step for i in range(int(360 / args.hue_step))]
+    grid = [(hue, chroma, tone) for hue in hues for chroma in CHROMAS for tone in TONES]
+
+    search_colors, search_time = solve_all(lambda hue, chroma, tone: searchIntInViewingConditions(hue, chroma, tone, ViewingConditions.DEFAULT), grid)
+    solver_colors, solver_time = solve_all(HctSolver.solveToInt, grid)
+
+    max_delta_e = 0.0
+    max_delta_e_at = None
+    total_delta_e = 0.0
+    different = 0
+    for request, search_color, solver_color in zip(grid, search_colors, solver_colors):
+        if search_color == solver_color:
+            continue
+        different += 1
+        delta_e = Cam16.fromInt(search_color).distance(Cam16.fromInt(solver_color))
+        total_delta_e += delta_e
+        if delta_e > max_delta_e:
+            max_delta_e = delta_e
+            max_delta_e_at = request
+
+    print("Colors solved:   " + str(len(grid)))
+    print("Binary search:   {:.3f} s ({:.1f} us per color)".format(search_time, search_time / len(grid) * 1e6))
+    print("HctSolver:       {:.3f} s ({:.1f} us per color)".format(solver_time, solver_time / len(grid) * 1e6))
+    print("Speedup:         {:.1f}x".format(search_time / solver_time))
+    print("Different colors: " + str(different))
+    print("Mean delta E:    {:.3f}".format(total_delta_e / len(grid)))
+    if max_delta_e_at is None:
+        print("Max delta E:     0")
+    else:
+        print("Max delta E:     {:.3f} at hue {}, chroma {}, tone {}".format(max_delta_e, *max_delta_e_at))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import glob
+import json
+import os
+import re
+from output_writer import write_atomic
+from source_color_cache import CACHE_DIR
+
+# Stylesheets of the themes applications load the generated gtk.css on top of,
+# by toolkit: adw-gtk3 for GTK 3 and GTK 4, and libadwaita, whose stylesheet
+# is embedded in the library and read from its resource section. gtk.css is
+# only trimmed when the stylesheets of every toolkit were found and scanned,
+# the colors of a toolkit that wasn't scanned would be missing
+THEME_STYLESHEETS = {
+    "adw-gtk3": [
+        "/usr/share/themes/adw-gtk3*/gtk-*/*.css",
+        "~/.local/share/themes/adw-gtk3*/gtk-*/*.css",
+        "~/.themes/adw-gtk3*/gtk-*/*.css",
+    ],
+    "libadwaita": [
+        "/usr/lib*/libadwaita-1.so*",
+        "/usr/lib*/*/libadwaita-1.so*",
+    ],
+}
+USAGE_CACHE_FILE = os.path.join(CACHE_DIR, "css_usage.json")
+# Bump when the scan changes, older results are scanned again
+USAGE_CACHE_VERSION = 1
+
+# Named colors, @name, and the custom properties libadwaita defines them with, var(--name)
+COLOR_REFERENCE = re.compile(rb"@([A-Za-z_][A-Za-z0-9_]*)|var\(--([A-Za-z0-9_-]+)")
+
+def stylesheet_paths(patterns) -> list[str]:
+    paths = set()
+    for pattern in patterns:
+        paths.update(path for path in glob.glob(os.path.expanduser(pattern)) if os.path.isfile(path))
+    return sorted(paths)
+
+def toolkit_stylesheet_paths(toolkits=THEME_STYLESHEETS):
+    """Stylesheets of every toolkit, or None when one of the toolkits has none"""
+    paths = set()
+    for patterns in toolkits.values():
+        found = stylesheet_paths(patterns)
+        if len(found) == 0:
+            return None
+        paths.update(found)
+    return sorted(paths)
+
+def scan_stylesheets(paths):
+    """Names of the colors the stylesheets reference, or None when one of them can't be read
+
+    A file without any color definition, like a library whose stylesheet is
+    compressed, can't tell which colors it needs. Other @ names, like symbol
+    versions of a library, are picked up too, they only keep a few more colors.
+    """
+    names = set()
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        if b"@define-color" not in data and b"var(--" not in data:
+            return None
+        for match in COLOR_REFERENCE.finditer(data):
+            if match.group(1) is not None:
+                names.add(match.group(1).decode("ascii"))
+            else:
+                names.add(match.group(2).decode("ascii").replace("-", "_"))
+    return names
+
+def referenced_names(toolkits=THEME_STYLESHEETS, cache_path: str = USAGE_CACHE_FILE):
+    """Names of the colors the installed themes reference, or None when they can't be told
+
+    toolkits maps each toolkit to the glob patterns of its stylesheets. The
+    names can't be told when a toolkit has no stylesheet, or when one of them
+    can't be scanned, see scan_stylesheets().
+
+    The stylesheets are scanned once, the result is kept in the cache directory
+    along with the size and mtime of every stylesheet, so installing or
+    updating a theme scans them again.
+    """
+    paths = toolkit_stylesheet_paths(toolkits)
+    if paths is None:
+        return None
+    stamps = []
+    for path in paths:
+        stat = os.stat(path)
+        stamps.append([path, stat.st_size, stat.st_mtime_ns])
+    try:
+        with open(cache_path, "r") as f:
+            cached = json.load(f)
+        if cached["version"] == USAGE_CACHE_VERSION and cached["stylesheets"] == stamps:
+            return None if cached["names"] is None else set(cached["names"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    names = scan_stylesheets(paths)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        data = {"version": USAGE_CACHE_VERSION, "stylesheets": stamps, "names": None if names is None else sorted(names)}
+        write_atomic(cache_path, json.dumps(data).encode("utf-8"), 0o600)
+    except OSError as e:
+        print("Cannot write stylesheet scan: " + str(e))
+    return names
+
+def trim_names(toolkits=THEME_STYLESHEETS, cache_path: str = USAGE_CACHE_FILE):
+    """referenced_names(), telling when gtk.css can't be trimmed"""
+    names = referenced_names(toolkits, cache_path)
+    if names is None:
+        print("Cannot tell which colors the installed themes use, the stylesheets of a toolkit are missing or compressed, gtk.css defines every color")
+    return names
@@ -2,14 +2,24 @@ from os.path import expanduser
 import subprocess, os, sys
 from threading import Thread
 import threading
-from map_colors import map_colors
+from map_colors import load_plans, mapped_preset
+from json_cache import load_json
+from css_usage import trim_names
+from theme_renderer import ThemeRenderer, TARGET_GTK3, TARGET_GTK4, TARGET_SHELL, TARGET_ARCMENU, TARGET_PYWAL
 from color_utils import ColorUtils
+from wallpaper import downscale, open_wallpaper
+from source_color_cache import SourceColorCache
+from accent_table import AccentTable, inputs_fingerprint
+from material_color_utilities_python.utils.image_utils import argbArrayFromImage
 from material_color_utilities_python.utils.theme_utils import *
-from PIL import Image
 import urllib.parse
-import shutil
+import numpy as np
 
 MU_BACKEND = True
+# Downscale mode for wallpapers, "speed" or "quality", see wallpaper.RESAMPLE_MODES
+RESIZE_MODE = "speed"
+# Define only the colors the installed themes reference in gtk.css, see css_usage
+TRIM_GTK_CSS = False
 ARCMENU_UUID = "arcmenu@arcmenu.com"
 ARCMENU_SCHEMA = "org.gnome.shell.extensions.arcmenu"
 EXTENSION_UUID = "material-you-colors@francescocaracciolo.github.io"
@@ -45,18 +55,6 @@ ACCENT_TO_COLOR = {
 };
 COLORS = {"#643f00": 0xffbc9769, "#005142": 0xffdafaef, "#722b65": 0xffdcabcc, "#00497e": 0xffd1e1f8, "#225104": 0xff7d916e, "#004397": 0xff4285f4, "#7c2c1b": 0xffb18c84, "#00504e": 0xff7ca7a5, "#403c8e": 0xffb7b4cf, "#3d4c00": 0xffb0b78e, "#64307c ": 0xff8e7596, "#005137 ": 0xff9bb8a8, "#4e4800": 0xfff0eab7};
  
-def calculate_optimal_size (width: int, height: int, bitmap_size: int) -> (int, int):
-    image_area = width * height;
-    bitmap_area = bitmap_size ** 2
-    scale = math.sqrt(bitmap_area/image_area) if image_area > bitmap_area else 1
-    new_width = round(width * scale)
-    new_height = round(height * scale)
-    if new_width == 0:
-        new_width = 1
-    if new_height == 0:
-        new_height = 1
-    return new_width, new_height
-
 def generate_pywal(background, image, is_dark):
     subprocess.Popen(["wal", "-b", background, "-i", image, "-nqe" if is_dark else "-nqel"])
 
@@ -111,25 +109,14 @@ def change_arcmenu_theme(vars):
     set_setting("menu-item-hover-bg-color", "\\" + vars["accent_bg_color"], ARCMENU_SCHEMA, uuid=ARCMENU_UUID)
     set_setting("menu-item-hover-fg-color", "\\" + vars["accent_fg_color"], ARCMENU_SCHEMA, uuid=ARCMENU_UUID)
 
-def apply_gtk_theme(base_preset):
-    # Generate css
-    css = ""
-    for key in base_preset["variables"]:
-        css +=  "@define-color " + key + " " + base_preset["variables"][key] + ";\n"
-    for prefix_key in base_preset["palette"]:
-        for key_2 in base_preset["palette"][prefix_key]:
-            css += "@define-color " + prefix_key + key_2 + " " + base_preset["palette"][prefix_key][key_2] + ";\n"
-    f = open(os.path.expanduser("~/.config/gtk-4.0/gtk.css"), "w+")
-    f.write(css)
-    f.close()
-    f = open(os.path.expanduser("~/.config/gtk-3.0/gtk.css"), "w+")
-    f.write(css)
-    f.close()
-    print("Theme applied")
-    f = open(os.path.expanduser("~/.config/gtk-4.0/.materialyou"), "w+")
-    f.write("yes")
-    f.close()
- 
+def backend_name():
+    return "materialyoucolor" if MU_BACKEND else "builtin"
+
+def theme_from_color(accent_color, isdark, roles = None):
+    if MU_BACKEND:
+        return theme_from_color_2(accent_color, isdark)
+    return themeFromSourceColor(int(accent_color), roles=roles)
+
 def theme_from_color_2(accent_color, isdark):
     from materialyoucolor.scheme import Scheme
     from material_color_utilities_python.utils import color_utils
@@ -144,31 +131,36 @@ def theme_from_color_2(accent_color, isdark):
     theme = {"schemes": {"dark": Scheme(generated), "light": Scheme(generated)}}
     return theme
 
-def theme_from_image_2(image, w, h, isdark):
+def source_colors_from_image_2(image, w, h):
     from materialyoucolor.quantize import QuantizeCelebi
     from materialyoucolor.score.score import Score
-    image.resize(calculate_optimal_size(image.height, image.width, 128), Image.Resampling.BICUBIC)
-    result = QuantizeCelebi(list(image.getdata()), 128)
-    return theme_from_color_2(Score.score(result)[0], isdark)
-
-def apply_gnome_theme(base_preset, isdark = True):
-
-    theme_path = expanduser("~/.local/share/themes/MaterialYou")
-    if not os.path.exists(theme_path):
-        os.mkdir(theme_path)
-        os.mkdir(theme_path + "/gnome-shell")
-    if not isdark:
-        path = expanduser(EXTENSIONDIR + "/shell/" + str(VERSION) + "/compiled_shell_light.scss")
-    else:
-        path = expanduser(EXTENSIONDIR + "/shell/" + str(VERSION) + "/compiled_shell_dark.scss")
-    f = open(path, "r")
-    content = f.read()
-    content = content.replace("-st-accent-color", base_preset["variables"]["accent_bg_color"]).replace("-st-accent-fg-color", base_preset["variables"]["accent_fg_color"])
-    theme_path = expanduser("~/.local/share/themes/MaterialYou/gnome-shell/gnome-shell.css")
-    shutil.copyfile(path + ".map", theme_path + ".map")
-    f = open(theme_path, "w+")
-    f.write(content)
-    f.close()
+    image = downscale(image, w, h, RESIZE_MODE)
+    print("Quantizing " + str(image.width * image.height) + " pixels (" + str(image.width) + "x" + str(image.height) + ")")
+    # Every pixel, materialyoucolor ignores alpha. Its binding takes a
+    # sequence of [r, g, b] rows, not packed colors
+    pixels = argbArrayFromImage(image, False)
+    result = QuantizeCelebi(np.stack(((pixels >> 16) & 0xFF, (pixels >> 8) & 0xFF, pixels & 0xFF), axis=1).tolist(), 128)
+    return Score.score(result)
+
+def theme_from_image_2(image, w, h, isdark):
+    return theme_from_color_2(source_colors_from_image_2(image, w, h)[0], isdark)
+
+def source_colors_from_wallpaper(wall_path, w, h):
+    # Only open the wallpaper when the cache misses
+    cache = SourceColorCache()
+    params = {"backend": backend_name(), "width": w, "height": h, "mode": RESIZE_MODE, "max_colors": 128}
+    key = cache.make_key(wall_path, params)
+    colors = cache.get(key)
+    if colors is None:
+        image = open_wallpaper(wall_path, w, h, RESIZE_MODE)
+        if MU_BACKEND:
+            colors = source_colors_from_image_2(image, w, h)
+        else:
+            colors = topColorsFromImage(downscale(image, w, h, RESIZE_MODE))
+        cache.put(key, colors)
+    return colors
+
+def reload_shell_theme():
     set_setting("name", "reset", "org.gnome.shell.extensions.user-theme")
 
 def apply_theme(accent_color_applied = False):
@@ -196,44 +188,53 @@ def apply_theme(accent_color_applied = False):
             set_setting("accent-color-lock", "true", EXTENSION_SCHEMA, uuid=EXTENSION_UUID)
         set_setting("accent-color", accent_color, EXTENSION_SCHEMA, uuid=EXTENSION_UUID)
 
-    # Generate theme
+    variant = color_scheme.lower()
+    scheme = "light" if not is_dark else "dark"
+    base_preset = None
     if accent_color_enabled or accent_color_applied:
-        if MU_BACKEND:
-            theme = theme_from_color_2(accent_color, is_dark)
-        else:
-            theme = themeFromSourceColor(int(accent_color))
         if accent_color in COLOR_TO_ACCENT and not accent_color_applied:
             set_setting("accent-color", COLOR_TO_ACCENT[accent_color], 'org.gnome.desktop.interface')
-    else:
-        if MU_BACKEND:
-            theme = theme_from_image_2(Image.open(wall_path), int(width), int(height), is_dark)
+        # GNOME accent colors are precomputed by install.sh
+        try:
+            base_preset = AccentTable().get(inputs_fingerprint(backend_name()), int(accent_color), variant, scheme)
+        except (OSError, ValueError):
+            base_preset = None
+
+    if base_preset is None:
+        # Load color mappings, the theme only computes the roles they reference
+        cmfile = os.path.join(os.path.dirname(os.path.abspath(__file__)), "color_mappings.json")
+        bpfile = os.path.join(os.path.dirname(os.path.abspath(__file__)), "base_presets.json")
+        base_presets = load_json(bpfile)
+        try:
+            plan = load_plans(cmfile)[variant][scheme]
+        except Exception as e:
+            print("Cannot open color mappings file")
+            exit(-1)
+        roles = set(plan.slots)
+
+        # Generate theme
+        if accent_color_enabled or accent_color_applied:
+            theme = theme_from_color(accent_color, is_dark, roles)
         else:
-            theme = themeFromImage(Image.open(wall_path))
-    
-    # Map colors
-    cmfile = os.path.join(os.path.dirname(os.path.abspath(__file__)), "color_mappings.json")
-    bpfile = os.path.join(os.path.dirname(os.path.abspath(__file__)), "base_presets.json")
-    f = open(bpfile, "r")
-    base_presets = json.loads(f.read())
-    f.close()
-    try:
-        f = open(cmfile, "r")
-        color_mappings = json.loads(f.read())
-        f.close()
-    except Exception as e:
-        print("Cannot open color mappings file")
-        exit(-1)
-
-    variant = color_scheme.lower()
-    scheme = "light" if not is_dark else "dark"
-    base_preset = map_colors(color_mappings[variant][scheme], base_presets[scheme], theme["schemes"][scheme].props)
-
-    threading.Thread(target=apply_gtk_theme, args=(base_preset, )).start()
-    threading.Thread(target=apply_gnome_theme, args=(base_preset, is_dark,)).start() 
+            source_color = source_colors_from_wallpaper(wall_path, int(width), int(height))[0]
+            theme = theme_from_color(source_color, is_dark, roles)
+
+        # Map colors
+        base_preset = mapped_preset(base_presets[scheme], plan.apply(theme["schemes"][scheme].props))
+
+    # Render every target in one pass, the unchanged ones are skipped
+    renderer = ThemeRenderer(expanduser(EXTENSIONDIR + "/shell/" + str(VERSION)),
+        set_arcmenu=lambda variables: threading.Thread(target=change_arcmenu_theme, args=(variables,)).start(),
+        run_pywal=generate_pywal,
+        reload_shell=reload_shell_theme,
+        css_names=trim_names() if TRIM_GTK_CSS else None)
+    targets = [TARGET_GTK3, TARGET_GTK4, TARGET_SHELL]
     if enable_arcmenu_theming:
-        threading.Thread(target=change_arcmenu_theme, args=(base_preset["variables"],)).start()
+        targets.append(TARGET_ARCMENU)
     if enable_pywal_theming:
-        generate_pywal(base_preset["variables"]["window_bg_color"], wall_path, is_dark)
+        targets.append(TARGET_PYWAL)
+    renderer.render(base_preset, is_dark, targets, wall_path)
+    print("Theme applied (" + renderer.writer.summary() + ")")
     if extra_command:
        Thread(target=execute_command, args=(extra_command,)).start() 
 
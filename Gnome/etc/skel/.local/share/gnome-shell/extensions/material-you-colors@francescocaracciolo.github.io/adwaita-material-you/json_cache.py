@@ -0,0 +1,89 @@
+import json
+import marshal
+import os
+from collections.abc import Mapping
+from output_writer import write_atomic
+
+SNAPSHOT_SUFFIX = ".bin"
+# Bump when the format of the snapshots changes, older snapshots are reparsed
+SNAPSHOT_VERSION = 1
+
+# Files already loaded by this process, by path
+loaded_files = {}
+
+class FrozenView(Mapping):
+    """Read-only view of a parsed JSON object
+
+    Nested objects and arrays are wrapped when they are read, so viewing a
+    whole file costs nothing up front, unlike copying or freezing it.
+    """
+    __slots__ = ("data",)
+
+    def __init__(self, data: dict):
+        self.data = data
+
+    def __getitem__(self, key):
+        return freeze(self.data[key])
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return "FrozenView(" + repr(self.data) + ")"
+
+def freeze(value):
+    """Read-only view of parsed JSON: objects become FrozenViews and arrays tuples"""
+    if isinstance(value, dict):
+        return FrozenView(value)
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+def thaw(value):
+    """Mutable copy of a frozen value, as json.loads would return it"""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+def load_json(path: str):
+    """Parsed content of a JSON data file, as a read-only view
+
+    The parsed data is kept next to the file, in <file>.bin (marshal), and
+    parsed again when the size or the mtime of the file changes, so repeated
+    runs skip JSON parsing. The view is shared between callers, build new
+    dicts instead of modifying it. Raises OSError or ValueError when the file
+    can't be read.
+    """
+    stat = os.stat(path)
+    stamp = (SNAPSHOT_VERSION, stat.st_size, stat.st_mtime_ns)
+    cached = loaded_files.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    data = None
+    try:
+        with open(path + SNAPSHOT_SUFFIX, "rb") as f:
+            snapshot = marshal.loads(f.read())
+        if snapshot[0] == stamp:
+            data = snapshot[1]
+    except (OSError, EOFError, ValueError, TypeError, IndexError):
+        data = None
+
+    if data is None:
+        with open(path, "r") as f:
+            data = json.load(f)
+        # Write to a temporary file and rename it, a read-only install just
+        # parses the JSON on every run
+        try:
+            write_atomic(path + SNAPSHOT_SUFFIX, marshal.dumps((stamp, data)))
+        except OSError as e:
+            print("Cannot write snapshot of " + path + ": " + str(e))
+
+    view = freeze(data)
+    loaded_files[path] = (stamp, view)
+    return view
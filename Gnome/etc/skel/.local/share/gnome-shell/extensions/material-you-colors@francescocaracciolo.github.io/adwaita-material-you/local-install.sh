@@ -1,6 +1,7 @@
 #!/bin/bash
+cd "$(dirname "$0")"
 
 python3 -m venv venv
 source venv/bin/activate
 pip install -r requirements.txt
-
+python3 accent_table.py
@@ -1,11 +1,18 @@
 from color_utils import ColorUtils
 from material_color_utilities_python import *
-import json, os
-import map_colors
+import os
+from map_colors import load_plans, mapped_preset
+from json_cache import load_json
+from output_writer import OutputWriter
+from css_usage import trim_names
+from theme_renderer import ThemeRenderer, gtk_css, TARGET_GTK3, TARGET_GTK4
+from wallpaper import downscale, open_wallpaper
 import argparse
 from materialyoucolor.scheme import Scheme
 
 MU_BACKEND = True
+# Downscale mode for wallpapers, "speed" or "quality", see wallpaper.RESAMPLE_MODES
+RESIZE_MODE = "speed"
 def main():
     parser = argparse.ArgumentParser()
     print(os.getcwd())
@@ -17,6 +24,7 @@ def main():
     parser.add_argument("-o", "--output", help="Choose the output file")
     parser.add_argument("-a", "--apply", action="store_true", help="Apply the theme after it is generated")
     parser.add_argument("-m", "--mappings", help="Color mappings file")
+    parser.add_argument("-t", "--trim", action="store_true", help="Only define the colors the installed themes reference")
     parser.add_argument("-V", "--variant", help="Variant of the theme, with predefined color_mappings can be defualt, vibrant, expressive, fruit salad, muted")
 
     args = parser.parse_args()
@@ -25,7 +33,8 @@ def main():
         color = args.color
         argb = argbFromHex(color) 
     elif args.wallpaper:
-        img = Image.open(args.wallpaper)
+        # Decode and downscale the wallpaper like the extension does
+        img = downscale(open_wallpaper(os.path.expanduser(args.wallpaper), mode=RESIZE_MODE), mode=RESIZE_MODE)
         argb = sourceColorFromImage(img)
     else:
         print("Error: at least one argument between color and wallpaper must be specified")
@@ -50,41 +59,24 @@ def main():
         print("Color scheme must be dark or light")
         exit(-1)
     
-    f = open(bpfile, "r")
-    base_presets = json.loads(f.read())
-    f.close()
+    base_presets = load_json(bpfile)
     try:
-        f = open(cmfile, "r")
-        color_mappings = json.loads(f.read())
-        f.close()
+        plan = load_plans(cmfile)[variant][scheme]
     except Exception as e:
         print("Cannot open color mappings file")
         exit(-1)
     
 
     # Generate theme
-    base_preset = map_colors.map_colors(color_mappings[variant][scheme], base_presets[scheme], theme["schemes"][scheme].props)
-    # Generate css
-    css = ""
-    for key in base_preset["variables"]:
-        css +=  "@define-color " + key + " " + base_preset["variables"][key] + ";\n"
-    for prefix_key in base_preset["palette"]:
-        for key_2 in base_preset["palette"][prefix_key]:
-            css += "@define-color " + prefix_key + key_2 + " " + base_preset["palette"][prefix_key][key_2] + ";\n"
-
+    base_preset = mapped_preset(base_presets[scheme], plan.apply(theme["schemes"][scheme].props))
+    css_names = trim_names() if args.trim else None
     if args.output:
-        f = open(os.path.expanduser(args.output), "w+")
-        f.write(css)
-        f.close()
+        OutputWriter().write(args.output, gtk_css(base_preset, css_names))
         print("Theme saved to file")
     if args.apply:
-        f = open(os.path.expanduser("~/.config/gtk-4.0/gtk.css"), "w+")
-        f.write(css)
-        f.close()
-        f = open(os.path.expanduser("~/.config/gtk-3.0/gtk.css"), "w+")
-        f.write(css)
-        f.close()
-        print("Theme applied")
+        renderer = ThemeRenderer(css_names=css_names)
+        renderer.render(base_preset, scheme == "dark", [TARGET_GTK3, TARGET_GTK4])
+        print("Theme applied (" + renderer.writer.summary() + ")")
 
 if __name__ == "__main__":
     main()
@@ -1,27 +1,125 @@
-from transformers import ColorTransformer
+import marshal
+import os
+from collections.abc import Mapping
 from color_utils import ColorUtils
+from json_cache import load_json
+from output_writer import write_atomic
 
-def map_colors(color_mapping, base_preset, scheme):
-    for key in color_mapping:
-        if not isinstance(color_mapping[key], list):
-            if color_mapping[key]["opacity"] == 1:
-                base_preset["variables"][key] = ColorTransformer.argb_to_hex(scheme[color_mapping[key]["color"]])
+# Operations of a compiled mapping step
+OP_HEX = 0
+OP_RGBA = 1
+OP_BLEND = 2
+# Bump when the format of the compiled plans changes, older plan files are recompiled
+PLAN_VERSION = 1
+PLAN_SUFFIX = ".plan"
+
+class MappingPlan:
+    """A color mapping compiled into a flat list of steps
+
+    The scheme roles the mapping reads are numbered once as slots, and every
+    mapped variable becomes a (target, op, slots, opacities) step, so applying
+    the plan resolves each role a single time and runs no type checks.
+
+    OP_HEX writes a role as a hex color, OP_RGBA as an rgba() color with the
+    opacity already formatted, and OP_BLEND stacks the roles with their
+    opacities with ColorUtils.blend_argb.
+    """
+    def __init__(self, slots: list[str], steps: list[tuple]):
+        self.slots = slots
+        self.steps = steps
+
+    @staticmethod
+    def compile(color_mapping: dict) -> "MappingPlan":
+        slots = []
+        slot_index = {}
+        def slot(role):
+            if role not in slot_index:
+                slot_index[role] = len(slots)
+                slots.append(role)
+            return slot_index[role]
+
+        steps = []
+        for key, value in color_mapping.items():
+            if isinstance(value, Mapping):
+                if value["opacity"] == 1:
+                    steps.append((key, OP_HEX, (slot(value["color"]),), ()))
+                else:
+                    steps.append((key, OP_RGBA, (slot(value["color"]),), (str(value["opacity"]),)))
+            elif len(value) > 0:
+                # Alpha bytes, as ColorTransformer.rgba_to_argb rounds them
+                steps.append((key, OP_BLEND, tuple(slot(color["color"]) for color in value), tuple(round(color["opacity"] * 255) for color in value)))
+        return MappingPlan(slots, steps)
+
+    def apply(self, scheme: dict) -> dict:
+        """Mapped variables of one scheme, in the order of the mapping"""
+        values = [scheme[role] for role in self.slots]
+        variables = {}
+        for key, op, slots, opacities in self.steps:
+            if op == OP_HEX:
+                variables[key] = "#%06x" % (values[slots[0]] & 0xffffff)
+            elif op == OP_RGBA:
+                argb = values[slots[0]]
+                variables[key] = "rgba(" + str((argb >> 16) & 0xff) + ", " + str((argb >> 8) & 0xff) + ", " + str(argb & 0xff) + ", " + opacities[0] + ")"
             else:
-                argb = scheme[color_mapping[key]["color"]]
-                r = str(ColorUtils.red_from_argb(argb))
-                g = str(ColorUtils.green_from_argb(argb))
-                b = str(ColorUtils.blue_from_argb(argb))
-                rgba_str = "rgba(" + r + ", " + g + ", " + b + ", " + str(color_mapping[key]["opacity"]) + ")"
-                base_preset["variables"][key] = rgba_str
-        elif len(color_mapping[key])> 0:
-            total_color = scheme[color_mapping[key][0]["color"]]
-            for color in color_mapping[key]:
-                argb = scheme[color["color"]]
-                r = ColorUtils.red_from_argb(argb)
-                g = ColorUtils.green_from_argb(argb)
-                b = ColorUtils.blue_from_argb(argb)
-                a = color["opacity"]
-                added_color = ColorTransformer.rgba_to_argb(r,g,b,a)
-                total_color = ColorUtils.blend_argb(total_color, added_color)
-            base_preset["variables"][key] = ColorTransformer.argb_to_hex(total_color)
-    return base_preset
\ No newline at end of file
+                total_color = values[slots[0]]
+                for index, added_alpha in zip(slots, opacities):
+                    total_color = ColorUtils.blend_argb(total_color, (added_alpha << 24) | (values[index] & 0xffffff))
+                variables[key] = "#%06x" % (total_color & 0xffffff)
+        return variables
+
+    def dump(self) -> tuple:
+        return (self.slots, self.steps)
+
+    @staticmethod
+    def from_dump(data: tuple) -> "MappingPlan":
+        return MappingPlan(list(data[0]), list(data[1]))
+
+# Plans already loaded by this process, by path of the mappings file
+loaded_plans = {}
+
+def load_plans(mappings_path: str) -> dict:
+    """Compiled plans of a color mappings file, by variant and scheme
+
+    The plans are cached next to the file, in <file>.plan, and recompiled when
+    the size or the mtime of the file changes. Raises OSError or ValueError when
+    the mappings file can't be read.
+    """
+    stat = os.stat(mappings_path)
+    stamp = (PLAN_VERSION, stat.st_size, stat.st_mtime_ns)
+    cached = loaded_plans.get(mappings_path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    data = None
+    try:
+        with open(mappings_path + PLAN_SUFFIX, "rb") as f:
+            data = marshal.loads(f.read())
+        if data[0] != stamp:
+            data = None
+    except (OSError, EOFError, ValueError, TypeError, IndexError):
+        data = None
+
+    if data is None:
+        color_mappings = load_json(mappings_path)
+        dumped = {variant: {scheme: MappingPlan.compile(color_mappings[variant][scheme]).dump() for scheme in color_mappings[variant]} for variant in color_mappings}
+        data = (stamp, dumped)
+        # Write to a temporary file and rename it, a read-only install just
+        # compiles the plans on every run
+        try:
+            write_atomic(mappings_path + PLAN_SUFFIX, marshal.dumps(data))
+        except OSError as e:
+            print("Cannot write color mapping plans: " + str(e))
+
+    plans = {variant: {scheme: MappingPlan.from_dump(dumped) for scheme, dumped in schemes.items()} for variant, schemes in data[1].items()}
+    loaded_plans[mappings_path] = (stamp, plans)
+    return plans
+
+def map_colors(color_mapping, base_preset, scheme):
+    base_preset["variables"].update(MappingPlan.compile(color_mapping).apply(scheme))
+    return base_preset
+
+def mapped_preset(base_preset, variables: dict) -> dict:
+    """New preset made of base_preset with variables set, base_preset is left untouched"""
+    preset = dict(base_preset)
+    preset["variables"] = {**base_preset["variables"], **variables}
+    return preset
@@ -1,6 +1,7 @@
 from ..utils.color_utils import *
 from ..utils.math_utils import *
 from ..hct.viewing_conditions import *
+import numpy as np
 import math
 
 # /**
@@ -41,6 +42,8 @@ class Cam16:
     #  * @param astar CAM16-UCS a coordinate
     #  * @param bstar CAM16-UCS b coordinate
     #  */
+    __slots__ = ("hue", "chroma", "j", "q", "m", "s", "jstar", "astar", "bstar")
+
     def __init__(self, hue, chroma, j, q, m, s, jstar, astar, bstar):
         self.hue = hue
         self.chroma = chroma
@@ -85,9 +88,9 @@ class Cam16:
         red = (argb & 0x00ff0000) >> 16
         green = (argb & 0x0000ff00) >> 8
         blue = (argb & 0x000000ff)
-        redL = linearized(red)
-        greenL = linearized(green)
-        blueL = linearized(blue)
+        redL = LINEARIZED[red]
+        greenL = LINEARIZED[green]
+        blueL = LINEARIZED[blue]
         x = 0.41233895 * redL + 0.35762064 * greenL + 0.18051042 * blueL
         y = 0.2126 * redL + 0.7152 * greenL + 0.0722 * blueL
         z = 0.01932141 * redL + 0.11916382 * greenL + 0.95034478 * blueL
@@ -112,16 +115,16 @@ class Cam16:
         hue =  atanDegrees + 360.0 if atanDegrees < 0 else atanDegrees - 360.0 if atanDegrees >= 360 else atanDegrees
         hueRadians = (hue * math.pi) / 180.0
         ac = p2 * viewingConditions.nbb
-        j = 100.0 * pow(ac / viewingConditions.aw, viewingConditions.c * viewingConditions.z)
-        q = (4.0 / viewingConditions.c) * math.sqrt(j / 100.0) * (viewingConditions.aw + 4.0) * viewingConditions.fLRoot
+        j = 100.0 * pow(ac / viewingConditions.aw, viewingConditions.jExponent)
+        q = viewingConditions.qFactor * math.sqrt(j / 100.0) * viewingConditions.awPlus4 * viewingConditions.fLRoot
         huePrime = hue + 360 if hue < 20.14 else hue
         eHue = 0.25 * (math.cos((huePrime * math.pi) / 180.0 + 2.0) + 3.8)
         p1 = (50000.0 / 13.0) * eHue * viewingConditions.nc * viewingConditions.ncb
         t = (p1 * math.sqrt(a * a + b * b)) / (u + 0.305)
-        alpha = pow(t, 0.9) * pow(1.64 - pow(0.29, viewingConditions.n), 0.73)
+        alpha = pow(t, 0.9) * viewingConditions.alphaFactor
         c = alpha * math.sqrt(j / 100.0)
         m = c * viewingConditions.fLRoot
-        s = 50.0 * math.sqrt((alpha * viewingConditions.c) / (viewingConditions.aw + 4.0))
+        s = 50.0 * math.sqrt((alpha * viewingConditions.c) / viewingConditions.awPlus4)
         jstar = ((1.0 + 100.0 * 0.007) * j) / (1.0 + 0.007 * j)
         mstar = (1.0 / 0.0228) * math.log(1.0 + 0.0228 * m)
         astar = mstar * math.cos(hueRadians)
@@ -146,10 +149,10 @@ class Cam16:
     #  */
     @staticmethod
     def fromJchInViewingConditions(j, c, h, viewingConditions):
-        q = (4.0 / viewingConditions.c) * math.sqrt(j / 100.0) * (viewingConditions.aw + 4.0) * viewingConditions.fLRoot
+        q = viewingConditions.qFactor * math.sqrt(j / 100.0) * viewingConditions.awPlus4 * viewingConditions.fLRoot
         m = c * viewingConditions.fLRoot
         alpha = c / math.sqrt(j / 100.0)
-        s = 50.0 * math.sqrt((alpha * viewingConditions.c) / (viewingConditions.aw + 4.0))
+        s = 50.0 * math.sqrt((alpha * viewingConditions.c) / viewingConditions.awPlus4)
         hueRadians = (h * math.pi) / 180.0
         jstar = ((1.0 + 100.0 * 0.007) * j) / (1.0 + 0.007 * j)
         mstar = (1.0 / 0.0228) * math.log(1.0 + 0.0228 * m)
@@ -205,10 +208,10 @@ class Cam16:
     #  */
     def viewed(self, viewingConditions):
         alpha =  0.0 if self.chroma == 0.0 or self.j == 0.0 else self.chroma / math.sqrt(self.j / 100.0)
-        t = pow(alpha / pow(1.64 - pow(0.29, viewingConditions.n), 0.73), 1.0 / 0.9)
+        t = pow(alpha / viewingConditions.alphaFactor, 1.0 / 0.9)
         hRad = (self.hue * math.pi) / 180.0
         eHue = 0.25 * (math.cos(hRad + 2.0) + 3.8)
-        ac = viewingConditions.aw * pow(self.j / 100.0, 1.0 / viewingConditions.c / viewingConditions.z)
+        ac = viewingConditions.aw * pow(self.j / 100.0, viewingConditions.jExponentInverse)
         p1 = eHue * (50000.0 / 13.0) * viewingConditions.nc * viewingConditions.ncb
         p2 = ac / viewingConditions.nbb
         hSin = math.sin(hRad)
@@ -220,11 +223,11 @@ class Cam16:
         gA = (460.0 * p2 - 891.0 * a - 261.0 * b) / 1403.0
         bA = (460.0 * p2 - 220.0 * a - 6300.0 * b) / 1403.0
         rCBase = max(0, (27.13 * abs(rA)) / (400.0 - abs(rA)))
-        rC = signum(rA) * (100.0 / viewingConditions.fl) * pow(rCBase, 1.0 / 0.42)
+        rC = signum(rA) * viewingConditions.flScale * pow(rCBase, 1.0 / 0.42)
         gCBase = max(0, (27.13 * abs(gA)) / (400.0 - abs(gA)))
-        gC = signum(gA) * (100.0 / viewingConditions.fl) * pow(gCBase, 1.0 / 0.42)
+        gC = signum(gA) * viewingConditions.flScale * pow(gCBase, 1.0 / 0.42)
         bCBase = max(0, (27.13 * abs(bA)) / (400.0 - abs(bA)))
-        bC = signum(bA) * (100.0 / viewingConditions.fl) * pow(bCBase, 1.0 / 0.42)
+        bC = signum(bA) * viewingConditions.flScale * pow(bCBase, 1.0 / 0.42)
         rF = rC / viewingConditions.rgbD[0]
         gF = gC / viewingConditions.rgbD[1]
         bF = bC / viewingConditions.rgbD[2]
@@ -233,3 +236,180 @@ class Cam16:
         z = -0.01584150 * rF - 0.03412294 * gF + 1.04996444 * bF
         argb = argbFromXyz(x, y, z)
         return argb
+
+# /**
+#  * CAM16 coordinates of many colors at once, as a structure of arrays.
+#  *
+#  * Every field is a float64 array with one entry per color, and the
+#  * conversions run as whole-array NumPy operations instead of one Cam16
+#  * object per color. Results agree with Cam16 to within floating point
+#  * rounding, NumPy's pow and atan2 may differ from math's in the last bit.
+#  */
+class Cam16Array:
+    __slots__ = ("hue", "chroma", "j", "q", "m", "s", "jstar", "astar", "bstar")
+
+    def __init__(self, hue, chroma, j, q, m, s, jstar, astar, bstar):
+        self.hue = hue
+        self.chroma = chroma
+        self.j = j
+        self.q = q
+        self.m = m
+        self.s = s
+        self.jstar = jstar
+        self.astar = astar
+        self.bstar = bstar
+
+    def __len__(self):
+        return len(self.hue)
+
+    # /**
+    #  * @return Cam16 of the color at index i.
+    #  */
+    def __getitem__(self, i):
+        return Cam16(self.hue[i].item(), self.chroma[i].item(), self.j[i].item(), self.q[i].item(), self.m[i].item(), self.s[i].item(), self.jstar[i].item(), self.astar[i].item(), self.bstar[i].item())
+
+    # /**
+    #  * @param argbs ARGB colors, as a list or a uint32 array.
+    #  * @return CAM16 colors, assuming the colors were viewed in default viewing
+    #  *     conditions.
+    #  */
+    @staticmethod
+    def fromInts(argbs):
+        return Cam16Array.fromIntsInViewingConditions(argbs, ViewingConditions.DEFAULT)
+
+    # /**
+    #  * @param argbs ARGB colors, as a list or a uint32 array.
+    #  * @param viewingConditions Information about the environment where the
+    #  *     colors were observed.
+    #  * @return CAM16 colors.
+    #  */
+    @staticmethod
+    def fromIntsInViewingConditions(argbs, viewingConditions):
+        argbs = np.asarray(argbs, dtype = np.uint32)
+        linear = np.array(LINEARIZED)
+        redL = linear[(argbs >> 16) & 0xff]
+        greenL = linear[(argbs >> 8) & 0xff]
+        blueL = linear[argbs & 0xff]
+        x = 0.41233895 * redL + 0.35762064 * greenL + 0.18051042 * blueL
+        y = 0.2126 * redL + 0.7152 * greenL + 0.0722 * blueL
+        z = 0.01932141 * redL + 0.11916382 * greenL + 0.95034478 * blueL
+        rC = 0.401288 * x + 0.650173 * y - 0.051461 * z
+        gC = -0.250268 * x + 1.204414 * y + 0.045854 * z
+        bC = -0.002079 * x + 0.048952 * y + 0.953127 * z
+        rD = viewingConditions.rgbD[0] * rC
+        gD = viewingConditions.rgbD[1] * gC
+        bD = viewingConditions.rgbD[2] * bC
+        rAF = np.power((viewingConditions.fl * np.abs(rD)) / 100.0, 0.42)
+        gAF = np.power((viewingConditions.fl * np.abs(gD)) / 100.0, 0.42)
+        bAF = np.power((viewingConditions.fl * np.abs(bD)) / 100.0, 0.42)
+        rA = (np.sign(rD) * 400.0 * rAF) / (rAF + 27.13)
+        gA = (np.sign(gD) * 400.0 * gAF) / (gAF + 27.13)
+        bA = (np.sign(bD) * 400.0 * bAF) / (bAF + 27.13)
+        a = (11.0 * rA + -12.0 * gA + bA) / 11.0
+        b = (rA + gA - 2.0 * bA) / 9.0
+        u = (20.0 * rA + 20.0 * gA + 21.0 * bA) / 20.0
+        p2 = (40.0 * rA + 20.0 * gA + bA) / 20.0
+        atanDegrees = (np.arctan2(b, a) * 180.0) / math.pi
+        hue = np.where(atanDegrees < 0, atanDegrees + 360.0, np.where(atanDegrees >= 360, atanDegrees - 360.0, atanDegrees))
+        hueRadians = (hue * math.pi) / 180.0
+        ac = p2 * viewingConditions.nbb
+        j = 100.0 * np.power(ac / viewingConditions.aw, viewingConditions.jExponent)
+        q = viewingConditions.qFactor * np.sqrt(j / 100.0) * viewingConditions.awPlus4 * viewingConditions.fLRoot
+        huePrime = np.where(hue < 20.14, hue + 360, hue)
+        eHue = 0.25 * (np.cos((huePrime * math.pi) / 180.0 + 2.0) + 3.8)
+        p1 = (50000.0 / 13.0) * eHue * viewingConditions.nc * viewingConditions.ncb
+        t = (p1 * np.sqrt(a * a + b * b)) / (u + 0.305)
+        alpha = np.power(t, 0.9) * viewingConditions.alphaFactor
+        c = alpha * np.sqrt(j / 100.0)
+        m = c * viewingConditions.fLRoot
+        s = 50.0 * np.sqrt((alpha * viewingConditions.c) / viewingConditions.awPlus4)
+        jstar = ((1.0 + 100.0 * 0.007) * j) / (1.0 + 0.007 * j)
+        mstar = (1.0 / 0.0228) * np.log(1.0 + 0.0228 * m)
+        astar = mstar * np.cos(hueRadians)
+        bstar = mstar * np.sin(hueRadians)
+        return Cam16Array(hue, c, j, q, m, s, jstar, astar, bstar)
+
+    # /**
+    #  * @param j CAM16 lightness of each color.
+    #  * @param c CAM16 chroma of each color.
+    #  * @param h CAM16 hue of each color.
+    #  */
+    @staticmethod
+    def fromJch(j, c, h):
+        return Cam16Array.fromJchInViewingConditions(j, c, h, ViewingConditions.DEFAULT)
+
+    # /**
+    #  * @param j CAM16 lightness of each color.
+    #  * @param c CAM16 chroma of each color.
+    #  * @param h CAM16 hue of each color.
+    #  * @param viewingConditions Information about the environment where the
+    #  *     colors were observed.
+    #  */
+    @staticmethod
+    def fromJchInViewingConditions(j, c, h, viewingConditions):
+        j, c, h = np.broadcast_arrays(np.asarray(j, dtype = np.float64), np.asarray(c, dtype = np.float64), np.asarray(h, dtype = np.float64))
+        q = viewingConditions.qFactor * np.sqrt(j / 100.0) * viewingConditions.awPlus4 * viewingConditions.fLRoot
+        m = c * viewingConditions.fLRoot
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            alpha = c / np.sqrt(j / 100.0)
+        s = 50.0 * np.sqrt((alpha * viewingConditions.c) / viewingConditions.awPlus4)
+        hueRadians = (h * math.pi) / 180.0
+        jstar = ((1.0 + 100.0 * 0.007) * j) / (1.0 + 0.007 * j)
+        mstar = (1.0 / 0.0228) * np.log(1.0 + 0.0228 * m)
+        astar = mstar * np.cos(hueRadians)
+        bstar = mstar * np.sin(hueRadians)
+        return Cam16Array(h, c, j, q, m, s, jstar, astar, bstar)
+
+    # /**
+    #  * @return ARGB colors as a uint32 array, assuming the colors were viewed
+    #  *     in default viewing conditions.
+    #  */
+    def toInts(self):
+        return self.viewed(ViewingConditions.DEFAULT)
+
+    # /**
+    #  * @param viewingConditions Information about the environment where the
+    #  *     colors will be viewed.
+    #  * @return ARGB colors as a uint32 array.
+    #  */
+    def viewed(self, viewingConditions):
+        chroma = self.chroma
+        j = self.j
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            alpha = np.where((chroma == 0.0) | (j == 0.0), 0.0, chroma / np.sqrt(j / 100.0))
+        t = np.power(alpha / viewingConditions.alphaFactor, 1.0 / 0.9)
+        hRad = (self.hue * math.pi) / 180.0
+        eHue = 0.25 * (np.cos(hRad + 2.0) + 3.8)
+        ac = viewingConditions.aw * np.power(j / 100.0, viewingConditions.jExponentInverse)
+        p1 = eHue * (50000.0 / 13.0) * viewingConditions.nc * viewingConditions.ncb
+        p2 = ac / viewingConditions.nbb
+        hSin = np.sin(hRad)
+        hCos = np.cos(hRad)
+        gamma = (23.0 * (p2 + 0.305) * t) / (23.0 * p1 + 11.0 * t * hCos + 108.0 * t * hSin)
+        a = gamma * hCos
+        b = gamma * hSin
+        rA = (460.0 * p2 + 451.0 * a + 288.0 * b) / 1403.0
+        gA = (460.0 * p2 - 891.0 * a - 261.0 * b) / 1403.0
+        bA = (460.0 * p2 - 220.0 * a - 6300.0 * b) / 1403.0
+        with np.errstate(divide = "ignore"):
+            rCBase = np.maximum(0, (27.13 * np.abs(rA)) / (400.0 - np.abs(rA)))
+            gCBase = np.maximum(0, (27.13 * np.abs(gA)) / (400.0 - np.abs(gA)))
+            bCBase = np.maximum(0, (27.13 * np.abs(bA)) / (400.0 - np.abs(bA)))
+        rC = np.sign(rA) * viewingConditions.flScale * np.power(rCBase, 1.0 / 0.42)
+        gC = np.sign(gA) * viewingConditions.flScale * np.power(gCBase, 1.0 / 0.42)
+        bC = np.sign(bA) * viewingConditions.flScale * np.power(bCBase, 1.0 / 0.42)
+        rF = rC / viewingConditions.rgbD[0]
+        gF = gC / viewingConditions.rgbD[1]
+        bF = bC / viewingConditions.rgbD[2]
+        x = 1.86206786 * rF - 1.01125463 * gF + 0.14918677 * bF
+        y = 0.38752654 * rF + 0.62144744 * gF - 0.00897398 * bF
+        z = -0.01584150 * rF - 0.03412294 * gF + 1.04996444 * bF
+        # Same as argbFromXyz, a whole array at a time
+        matrix = XYZ_TO_SRGB
+        linearR = matrix[0][0] * x + matrix[0][1] * y + matrix[0][2] * z
+        linearG = matrix[1][0] * x + matrix[1][1] * y + matrix[1][2] * z
+        linearB = matrix[2][0] * x + matrix[2][1] * y + matrix[2][2] * z
+        r = np.searchsorted(DELINEARIZED_THRESHOLDS, linearR, side = "right").astype(np.uint32)
+        g = np.searchsorted(DELINEARIZED_THRESHOLDS, linearG, side = "right").astype(np.uint32)
+        b = np.searchsorted(DELINEARIZED_THRESHOLDS, linearB, side = "right").astype(np.uint32)
+        return np.uint32(0xff000000) | r << np.uint32(16) | g << np.uint32(8) | b
@@ -0,0 +1,101 @@
+from ..utils.color_utils import *
+from ..hct.cam16 import *
+from ..hct.hct_solver import *
+from collections import OrderedDict
+
+# /**
+#  * Number of bits of the forward table index, the table holds
+#  * 2 ** FORWARD_CACHE_BITS colors.
+#  */
+FORWARD_CACHE_BITS = 12
+
+# /**
+#  * Number of hue, chroma and tone triples whose solved color is remembered.
+#  */
+INVERSE_CACHE_SIZE = 2048
+
+# /**
+#  * Bounded memoization of the conversions between ARGB and HCT, in default
+#  * viewing conditions.
+#  *
+#  * Forward conversions (ARGB to CAM16 and L*) go through a direct-mapped table
+#  * indexed by the 24-bit RGB value: each slot holds the last color that
+#  * mapped to it, so a lookup is one index and one comparison, and a collision
+#  * simply replaces the slot.
+#  *
+#  * Inverse solves (hue, chroma and tone to ARGB) go through an LRU keyed by
+#  * the normalized triple, the hue sanitized and the tone clamped as getInt()
+#  * does. The triple is not rounded any further, so a cached result is always
+#  * the one the solver would return.
+#  *
+#  * Hits and misses of both levels are counted, see stats().
+#  */
+class ConversionCache:
+    def __init__(self, forwardBits = FORWARD_CACHE_BITS, inverseSize = INVERSE_CACHE_SIZE):
+        self.forwardBits = forwardBits
+        self.inverseSize = inverseSize
+        self.clear()
+
+    def clear(self):
+        self.forwardKeys = [-1] * (1 << self.forwardBits)
+        self.forwardValues = [None] * (1 << self.forwardBits)
+        self.inverse = OrderedDict()
+        self.forwardHits = 0
+        self.forwardMisses = 0
+        self.inverseHits = 0
+        self.inverseMisses = 0
+
+    # /**
+    #  * @param argb ARGB representation of a color.
+    #  * @return [cam, lstar], the CAM16 color and L* of argb. The Cam16 is
+    #  *     shared between callers and must not be modified.
+    #  */
+    def fromInt(self, argb):
+        rgb = argb & 0xffffff
+        # Fold the high bits in, so colors differing only in red do not all
+        # land in the same slot
+        slot = (rgb ^ (rgb >> self.forwardBits)) & ((1 << self.forwardBits) - 1)
+        if (self.forwardKeys[slot] == rgb):
+            self.forwardHits += 1
+            return self.forwardValues[slot]
+        self.forwardMisses += 1
+        value = [Cam16.fromInt(argb), lstarFromArgb(argb)]
+        self.forwardKeys[slot] = rgb
+        self.forwardValues[slot] = value
+        return value
+
+    # /**
+    #  * @param hue CAM16 hue, 0 <= hue < 360.
+    #  * @param chroma CAM16 chroma.
+    #  * @param tone L*a*b* lightness, 0 <= tone <= 100.
+    #  * @return ARGB representation of the color, as HctSolver.solveToInt.
+    #  */
+    def solve(self, hue, chroma, tone):
+        key = (hue, chroma, tone)
+        argb = self.inverse.get(key)
+        if (argb is not None):
+            self.inverseHits += 1
+            self.inverse.move_to_end(key)
+            return argb
+        self.inverseMisses += 1
+        argb = HctSolver.solveToInt(hue, chroma, tone)
+        self.inverse[key] = argb
+        if (len(self.inverse) > self.inverseSize):
+            self.inverse.popitem(last = False)
+        return argb
+
+    # /**
+    #  * @return Hit and miss counters of both levels, and the number of
+    #  *     triples held by the inverse LRU.
+    #  */
+    def stats(self):
+        return {
+            "forwardHits": self.forwardHits,
+            "forwardMisses": self.forwardMisses,
+            "inverseHits": self.inverseHits,
+            "inverseMisses": self.inverseMisses,
+            "inverseSize": len(self.inverse),
+        }
+
+# /** Cache used by Hct. */
+ConversionCache.DEFAULT = ConversionCache()
@@ -16,6 +16,8 @@
 from ..utils.color_utils import *
 from ..utils.math_utils import *
 from ..hct.cam16 import *
+from ..hct.conversion_cache import *
+from ..hct.hct_solver import *
 from ..hct.viewing_conditions import *
 
 # /**
@@ -75,13 +77,18 @@ def findCamByJ(hue, chroma, tone):
     return bestCam
 
 # /**
+#  * Binary search over chroma, then over J for each chroma, for a color with
+#  * the given hue and tone. This was the solver used before HctSolver, it is
+#  * kept for viewing conditions other than the default ones, and as the
+#  * reference of benchmarks/hct_solver.py.
+#  *
 #  * @param hue CAM16 hue.
 #  * @param chroma CAM16 chroma.
 #  * @param tone L*a*b* lightness.
 #  * @param viewingConditions Information about the environment where the color
 #  *     was observed.
 #  */
-def getIntInViewingConditions(hue, chroma, tone, viewingConditions):
+def searchIntInViewingConditions(hue, chroma, tone, viewingConditions):
     if (chroma < 1.0 or round(tone) <= 0.0 or round(tone) >= 100.0):
         return argbFromLstar(tone)
 
@@ -110,6 +117,19 @@ def getIntInViewingConditions(hue, chroma, tone, viewingConditions):
         return argbFromLstar(tone)
     return answer.viewed(viewingConditions)
 
+# /**
+#  * @param hue CAM16 hue.
+#  * @param chroma CAM16 chroma.
+#  * @param tone L*a*b* lightness.
+#  * @param viewingConditions Information about the environment where the color
+#  *     was observed.
+#  */
+def getIntInViewingConditions(hue, chroma, tone, viewingConditions):
+    # HctSolver inlines the default viewing conditions
+    if (viewingConditions is ViewingConditions.DEFAULT):
+        return HctSolver.solveToInt(hue, chroma, tone)
+    return searchIntInViewingConditions(hue, chroma, tone, viewingConditions)
+
 # /**
 #  * @param hue a number, in degrees, representing ex. red, orange, yellow, etc.
 #  *     Ranges from 0 <= hue < 360.
@@ -121,7 +141,9 @@ def getIntInViewingConditions(hue, chroma, tone, viewingConditions):
 #  * @return ARGB representation of a color in default viewing conditions
 #  */
 def getInt(hue, chroma, tone):
-    return getIntInViewingConditions(sanitizeDegreesDouble(hue), chroma, clampDouble(0.0, 100.0, tone), ViewingConditions.DEFAULT)
+    # Same as getIntInViewingConditions with the default viewing conditions,
+    # memoized
+    return ConversionCache.DEFAULT.solve(sanitizeDegreesDouble(hue), chroma, clampDouble(0.0, 100.0, tone))
 
 # /**
 #  * HCT, hue, chroma, and tone. A color system that provides a perceptually
@@ -129,11 +151,17 @@ def getInt(hue, chroma, tone):
 #  * will appear as in different lighting environments.
 #  */
 class Hct:
+    # A requested hue, chroma and tone are only solved when the color, or one
+    # of its dimensions, is read. argb is None until the solve, and solved
+    # stays False until the internal state holds the dimensions of argb.
+    __slots__ = ("internalHue", "internalChroma", "internalTone", "argb", "solved")
+
     def __init__(self, internalHue, internalChroma, internalTone):
         self.internalHue = internalHue
         self.internalChroma = internalChroma
         self.internalTone = internalTone
-        self.setInternalState(self.toInt())
+        self.argb = None
+        self.solved = False
 
     # /**
     #  * @param hue 0 <= hue < 360; invalid values are corrected.
@@ -154,18 +182,26 @@ class Hct:
     #  */
     @staticmethod
     def fromInt(argb):
-        cam = Cam16.fromInt(argb)
-        tone = lstarFromArgb(argb)
-        return Hct(cam.hue, cam.chroma, tone)
+        # The color is already known, there is nothing to solve
+        hct = Hct.__new__(Hct)
+        hct.setInternalState(argb)
+        return hct
 
     def toInt(self):
-        return getInt(self.internalHue, self.internalChroma, self.internalTone)
+        if (self.argb is None):
+            self.argb = getInt(self.internalHue, self.internalChroma, self.internalTone)
+        return self.argb
+
+    def solve(self):
+        if (not self.solved):
+            self.setInternalState(self.toInt())
 
     # /**
     #  * A number, in degrees, representing ex. red, orange, yellow, etc.
     #  * Ranges from 0 <= hue < 360.
     #  */
     def get_hue(self):
+        self.solve()
         return self.internalHue
 
     # /**
@@ -174,9 +210,10 @@ class Hct:
     #  * hue and tone.
     #  */
     def set_hue(self, newHue):
-        self.setInternalState(getInt(sanitizeDegreesDouble(newHue), self.internalChroma, self.internalTone))
+        self.set(hue = newHue)
 
     def get_chroma(self):
+        self.solve()
         return self.internalChroma
 
     # /**
@@ -185,10 +222,11 @@ class Hct:
     #  * hue and tone.
     #  */
     def set_chroma(self, newChroma):
-        self.setInternalState(getInt(self.internalHue, newChroma, self.internalTone))
+        self.set(chroma = newChroma)
 
     # /** Lightness. Ranges from 0 to 100. */
     def get_tone(self):
+        self.solve()
         return self.internalTone
 
     # /**
@@ -197,14 +235,31 @@ class Hct:
     #  * hue and tone.
     #  */
     def set_tone(self, newTone):
-        self.setInternalState(getInt(self.internalHue, self.internalChroma, newTone))
+        self.set(tone = newTone)
+
+    # /**
+    #  * Changes any of hue, chroma and tone at once, with a single solve. The
+    #  * dimensions left out keep their current value.
+    #  *
+    #  * Setting the properties one after the other solves after each of them,
+    #  * and chroma may decrease at every step.
+    #  */
+    def set(self, hue = None, chroma = None, tone = None):
+        if (hue is None or chroma is None or tone is None):
+            self.solve()
+        self.internalHue = sanitizeDegreesDouble(hue) if hue is not None else self.internalHue
+        self.internalChroma = chroma if chroma is not None else self.internalChroma
+        self.internalTone = tone if tone is not None else self.internalTone
+        self.argb = None
+        self.solved = False
 
     def setInternalState(self, argb):
-        cam = Cam16.fromInt(argb)
-        tone = lstarFromArgb(argb)
+        [cam, tone] = ConversionCache.DEFAULT.fromInt(argb)
         self.internalHue = cam.hue
         self.internalChroma = cam.chroma
         self.internalTone = tone
+        self.argb = argb
+        self.solved = True
 
     # Adding properties for getters and setters
     hue = property(get_hue, set_hue)
@@ -0,0 +1,425 @@
+from ..utils.color_utils import *
+from ..utils.math_utils import *
+from ..hct.cam16 import *
+from ..hct.viewing_conditions import *
+import math
+
+# /**
+#  * Inverts the product of a 3x3 matrix.
+#  */
+def matrixInverse(matrix):
+    [[a, b, c], [d, e, f], [g, h, i]] = matrix
+    determinant = a * (e * i - f * h) - b * (d * i - f * g) + c * (d * h - e * g)
+    return [
+        [(e * i - f * h) / determinant, (c * h - b * i) / determinant, (b * f - c * e) / determinant],
+        [(f * g - d * i) / determinant, (a * i - c * g) / determinant, (c * d - a * f) / determinant],
+        [(d * h - e * g) / determinant, (b * g - a * h) / determinant, (a * e - b * d) / determinant],
+    ]
+
+# /**
+#  * Matrix taking linear RGB to the cone responses of CAM16, with the
+#  * chromatic adaptation of the default viewing conditions and the luminance
+#  * level adaptation factor (fl / 100) applied.
+#  */
+def scaledDiscountFromLinrgb(viewingConditions):
+    m16 = [
+        [0.401288, 0.650173, -0.051461],
+        [-0.250268, 1.204414, 0.045854],
+        [-0.002079, 0.048952, 0.953127],
+    ]
+    matrix = []
+    for row in range(3):
+        scale = viewingConditions.rgbD[row] * viewingConditions.fl / 100.0
+        matrix.append([scale * sum(m16[row][k] * SRGB_TO_XYZ[k][column] for k in range(3)) for column in range(3)])
+    return matrix
+
+# /**
+#  * A class that solves the HCT equation.
+#  *
+#  * Ported from the HctSolver of material-color-utilities, it replaces the
+#  * nested binary searches over chroma and J: the color is first looked for
+#  * with a few Newton iterations on Y, and if it is out of gamut, the hue is
+#  * bisected on the boundary of the RGB cube at the requested Y.
+#  */
+# // libmonet is designed to have a consistent API across platforms
+# // and modular components that can be moved around easily. Using a class as a
+# // namespace facilitates this.
+# //
+# // tslint:disable-next-line:class-as-namespace
+class HctSolver:
+    @staticmethod
+    def sanitizeRadians(angle):
+        return (angle + math.pi * 8) % (math.pi * 2)
+
+    # /**
+    #  * Delinearizes an RGB component, returning a floating-point number.
+    #  *
+    #  * @param rgbComponent 0.0 <= rgb_component <= 100.0, represents linear
+    #  * R/G/B channel
+    #  * @return 0.0 <= output <= 255.0, color channel converted to regular
+    #  * RGB space
+    #  */
+    @staticmethod
+    def trueDelinearized(rgbComponent):
+        normalized = rgbComponent / 100.0
+        delinearized = 0.0
+        if (normalized <= 0.0031308):
+            delinearized = normalized * 12.92
+        else:
+            delinearized = 1.055 * math.pow(normalized, 1.0 / 2.4) - 0.055
+        return delinearized * 255.0
+
+    @staticmethod
+    def chromaticAdaptation(component):
+        af = math.pow(abs(component), 0.42)
+        return signum(component) * 400.0 * af / (af + 27.13)
+
+    # /**
+    #  * Returns the hue of a linear RGB color in CAM16.
+    #  *
+    #  * @param linrgb The linear RGB coordinates of a color.
+    #  * @return The hue of the color in CAM16, in radians.
+    #  */
+    @staticmethod
+    def hueOf(linrgb):
+        scaledDiscount = matrixMultiply(linrgb, HctSolver.SCALED_DISCOUNT_FROM_LINRGB)
+        rA = HctSolver.chromaticAdaptation(scaledDiscount[0])
+        gA = HctSolver.chromaticAdaptation(scaledDiscount[1])
+        bA = HctSolver.chromaticAdaptation(scaledDiscount[2])
+        # // redness-greenness
+        a = (11.0 * rA + -12.0 * gA + bA) / 11.0
+        # // yellowness-blueness
+        b = (rA + gA - 2.0 * bA) / 9.0
+        return math.atan2(b, a)
+
+    @staticmethod
+    def areInCyclicOrder(a, b, c):
+        deltaAB = HctSolver.sanitizeRadians(b - a)
+        deltaAC = HctSolver.sanitizeRadians(c - a)
+        return deltaAB < deltaAC
+
+    # /**
+    #  * Solves the lerp equation.
+    #  *
+    #  * @param source The starting number.
+    #  * @param mid The number in the middle.
+    #  * @param target The ending number.
+    #  * @return A number t such that lerp(source, target, t) = mid.
+    #  */
+    @staticmethod
+    def intercept(source, mid, target):
+        return (mid - source) / (target - source)
+
+    @staticmethod
+    def lerpPoint(source, t, target):
+        return [
+            source[0] + (target[0] - source[0]) * t,
+            source[1] + (target[1] - source[1]) * t,
+            source[2] + (target[2] - source[2]) * t,
+        ]
+
+    # /**
+    #  * Intersects a segment with a plane.
+    #  *
+    #  * @param source The coordinates of point A.
+    #  * @param coordinate The R-, G-, or B-coordinate of the plane.
+    #  * @param target The coordinates of point B.
+    #  * @param axis The axis the plane is perpendicular with. (0: R, 1: G, 2: B)
+    #  * @return The intersection point of the segment AB with the plane
+    #  *     R=coordinate, G=coordinate, or B=coordinate
+    #  */
+    @staticmethod
+    def setCoordinate(source, coordinate, target, axis):
+        t = HctSolver.intercept(source[axis], coordinate, target[axis])
+        return HctSolver.lerpPoint(source, t, target)
+
+    @staticmethod
+    def isBounded(x):
+        return 0.0 <= x <= 100.0
+
+    # /**
+    #  * Returns the nth possible vertex of the polygonal intersection.
+    #  *
+    #  * @param y The Y value of the plane.
+    #  * @param n The zero-based index of the point. 0 <= n <= 11.
+    #  * @return The nth possible vertex of the polygonal intersection of the y
+    #  *     plane and the RGB cube, in linear RGB coordinates, if it exists. If
+    #  *     this possible vertex lies outside of the cube, [-1.0, -1.0, -1.0] is
+    #  *     returned.
+    #  */
+    @staticmethod
+    def nthVertex(y, n):
+        kR = HctSolver.Y_FROM_LINRGB[0]
+        kG = HctSolver.Y_FROM_LINRGB[1]
+        kB = HctSolver.Y_FROM_LINRGB[2]
+        coordA = 0.0 if n % 4 <= 1 else 100.0
+        coordB = 0.0 if n % 2 == 0 else 100.0
+        if (n < 4):
+            g = coordA
+            b = coordB
+            r = (y - g * kG - b * kB) / kR
+            if (HctSolver.isBounded(r)):
+                return [r, g, b]
+            return [-1.0, -1.0, -1.0]
+        elif (n < 8):
+            b = coordA
+            r = coordB
+            g = (y - r * kR - b * kB) / kG
+            if (HctSolver.isBounded(g)):
+                return [r, g, b]
+            return [-1.0, -1.0, -1.0]
+        else:
+            r = coordA
+            g = coordB
+            b = (y - r * kR - g * kG) / kB
+            if (HctSolver.isBounded(b)):
+                return [r, g, b]
+            return [-1.0, -1.0, -1.0]
+
+    # /**
+    #  * Finds the segment containing the desired color.
+    #  *
+    #  * @param y The Y value of the color.
+    #  * @param targetHue The hue of the color.
+    #  * @return A list of two sets of linear RGB coordinates, each corresponding
+    #  *     to an endpoint of the segment containing the desired color.
+    #  */
+    @staticmethod
+    def bisectToSegment(y, targetHue):
+        left = [-1.0, -1.0, -1.0]
+        right = left
+        leftHue = 0.0
+        rightHue = 0.0
+        initialized = False
+        uncut = True
+        for n in range(12):
+            mid = HctSolver.nthVertex(y, n)
+            if (mid[0] < 0):
+                continue
+            midHue = HctSolver.hueOf(mid)
+            if (not initialized):
+                left = mid
+                right = mid
+                leftHue = midHue
+                rightHue = midHue
+                initialized = True
+                continue
+            if (uncut or HctSolver.areInCyclicOrder(leftHue, midHue, rightHue)):
+                uncut = False
+                if (HctSolver.areInCyclicOrder(leftHue, targetHue, midHue)):
+                    right = mid
+                    rightHue = midHue
+                else:
+                    left = mid
+                    leftHue = midHue
+        return [left, right]
+
+    @staticmethod
+    def midpoint(a, b):
+        return [
+            (a[0] + b[0]) / 2,
+            (a[1] + b[1]) / 2,
+            (a[2] + b[2]) / 2,
+        ]
+
+    @staticmethod
+    def criticalPlaneBelow(x):
+        return math.floor(x - 0.5)
+
+    @staticmethod
+    def criticalPlaneAbove(x):
+        return math.ceil(x - 0.5)
+
+    # /**
+    #  * Finds a color with the given Y and hue on the boundary of the cube.
+    #  *
+    #  * @param y The Y value of the color.
+    #  * @param targetHue The hue of the color.
+    #  * @return The desired color, in linear RGB coordinates.
+    #  */
+    @staticmethod
+    def bisectToLimit(y, targetHue):
+        [left, right] = HctSolver.bisectToSegment(y, targetHue)
+        leftHue = HctSolver.hueOf(left)
+        for axis in range(3):
+            if (left[axis] != right[axis]):
+                lPlane = -1
+                rPlane = 255
+                if (left[axis] < right[axis]):
+                    lPlane = HctSolver.criticalPlaneBelow(HctSolver.trueDelinearized(left[axis]))
+                    rPlane = HctSolver.criticalPlaneAbove(HctSolver.trueDelinearized(right[axis]))
+                else:
+                    lPlane = HctSolver.criticalPlaneAbove(HctSolver.trueDelinearized(left[axis]))
+                    rPlane = HctSolver.criticalPlaneBelow(HctSolver.trueDelinearized(right[axis]))
+                for i in range(8):
+                    if (abs(rPlane - lPlane) <= 1):
+                        break
+                    mPlane = math.floor((lPlane + rPlane) / 2.0)
+                    midPlaneCoordinate = HctSolver.CRITICAL_PLANES[mPlane]
+                    mid = HctSolver.setCoordinate(left, midPlaneCoordinate, right, axis)
+                    midHue = HctSolver.hueOf(mid)
+                    if (HctSolver.areInCyclicOrder(leftHue, targetHue, midHue)):
+                        right = mid
+                        rPlane = mPlane
+                    else:
+                        left = mid
+                        leftHue = midHue
+                        lPlane = mPlane
+        return HctSolver.midpoint(left, right)
+
+    @staticmethod
+    def inverseChromaticAdaptation(adapted):
+        adaptedAbs = abs(adapted)
+        base = max(0, 27.13 * adaptedAbs / (400.0 - adaptedAbs))
+        return signum(adapted) * math.pow(base, 1.0 / 0.42)
+
+    # /**
+    #  * Terms of the inverse CAM16 that only depend on the hue, shared by the
+    #  * colors of a tone ramp.
+    #  *
+    #  * @param hueRadians The desired hue in radians.
+    #  * @return [tInnerCoeff, p1, hSin, hCos]
+    #  */
+    @staticmethod
+    def hueTerms(hueRadians):
+        viewingConditions = ViewingConditions.DEFAULT
+        tInnerCoeff = 1 / viewingConditions.alphaFactor
+        eHue = 0.25 * (math.cos(hueRadians + 2.0) + 3.8)
+        p1 = eHue * (50000.0 / 13.0) * viewingConditions.nc * viewingConditions.ncb
+        hSin = math.sin(hueRadians)
+        hCos = math.cos(hueRadians)
+        return [tInnerCoeff, p1, hSin, hCos]
+
+    # /**
+    #  * Finds a color with the given hue, chroma, and Y.
+    #  *
+    #  * @param hueRadians The desired hue in radians.
+    #  * @param chroma The desired chroma.
+    #  * @param y The desired Y.
+    #  * @param hueTerms Optional result of hueTerms(hueRadians).
+    #  * @return The desired color as a hexadecimal integer, if found; 0
+    #  *     otherwise.
+    #  */
+    @staticmethod
+    def findResultByJ(hueRadians, chroma, y, hueTerms = None):
+        # // Initial estimate of j.
+        j = math.sqrt(y) * 11.0
+        # // ===========================================================
+        # // Operations inlined from Cam16 to avoid repeated calculation
+        # // ===========================================================
+        viewingConditions = ViewingConditions.DEFAULT
+        [tInnerCoeff, p1, hSin, hCos] = hueTerms if hueTerms is not None else HctSolver.hueTerms(hueRadians)
+        for iterationRound in range(5):
+            # // ===========================================================
+            # // Operations inlined from Cam16 to avoid repeated calculation
+            # // ===========================================================
+            jNormalized = j / 100.0
+            alpha = 0.0 if chroma == 0.0 or j == 0.0 else chroma / math.sqrt(jNormalized)
+            t = math.pow(alpha * tInnerCoeff, 1.0 / 0.9)
+            ac = viewingConditions.aw * math.pow(jNormalized, viewingConditions.jExponentInverse)
+            p2 = ac / viewingConditions.nbb
+            gamma = 23.0 * (p2 + 0.305) * t / (23.0 * p1 + 11 * t * hCos + 108.0 * t * hSin)
+            a = gamma * hCos
+            b = gamma * hSin
+            rA = (460.0 * p2 + 451.0 * a + 288.0 * b) / 1403.0
+            gA = (460.0 * p2 - 891.0 * a - 261.0 * b) / 1403.0
+            bA = (460.0 * p2 - 220.0 * a - 6300.0 * b) / 1403.0
+            rCScaled = HctSolver.inverseChromaticAdaptation(rA)
+            gCScaled = HctSolver.inverseChromaticAdaptation(gA)
+            bCScaled = HctSolver.inverseChromaticAdaptation(bA)
+            linrgb = matrixMultiply([rCScaled, gCScaled, bCScaled], HctSolver.LINRGB_FROM_SCALED_DISCOUNT)
+            # // ===========================================================
+            # // Operations inlined from Cam16 to avoid repeated calculation
+            # // ===========================================================
+            if (linrgb[0] < 0 or linrgb[1] < 0 or linrgb[2] < 0):
+                return 0
+            kR = HctSolver.Y_FROM_LINRGB[0]
+            kG = HctSolver.Y_FROM_LINRGB[1]
+            kB = HctSolver.Y_FROM_LINRGB[2]
+            fnj = kR * linrgb[0] + kG * linrgb[1] + kB * linrgb[2]
+            if (fnj <= 0):
+                return 0
+            if (iterationRound == 4 or abs(fnj - y) < 0.002):
+                if (linrgb[0] > 100.01 or linrgb[1] > 100.01 or linrgb[2] > 100.01):
+                    return 0
+                return argbFromLinrgb(linrgb)
+            # // Iterates with Newton method,
+            # // Using 2 * fn(j) / j as the approximation of fn'(j)
+            j = j - (fnj - y) * j / (2 * fnj)
+        return 0
+
+    # /**
+    #  * Finds an sRGB color with the given hue, chroma, and L*, if possible.
+    #  *
+    #  * @param hueDegrees The desired hue, in degrees.
+    #  * @param chroma The desired chroma.
+    #  * @param lstar The desired L*.
+    #  * @return A hexadecimal representing the sRGB color. The color has
+    #  *     sufficiently close hue, chroma, and L* to the desired values, if
+    #  *     possible; otherwise, the hue and L* will be sufficiently close, and
+    #  *     chroma will be maximized.
+    #  */
+    @staticmethod
+    def solveToInt(hueDegrees, chroma, lstar):
+        if (chroma < 0.0001 or lstar < 0.0001 or lstar > 99.9999):
+            return argbFromLstar(lstar)
+        hueDegrees = sanitizeDegreesDouble(hueDegrees)
+        hueRadians = hueDegrees / 180 * math.pi
+        y = yFromLstar(lstar)
+        exactAnswer = HctSolver.findResultByJ(hueRadians, chroma, y)
+        if (exactAnswer != 0):
+            return exactAnswer
+        linrgb = HctSolver.bisectToLimit(y, hueRadians)
+        return argbFromLinrgb(linrgb)
+
+    # /**
+    #  * Finds sRGB colors with the given hue and chroma and each of the given
+    #  * L*, like solveToInt, computing the terms that depend on the hue once.
+    #  *
+    #  * @param hueDegrees The desired hue, in degrees.
+    #  * @param chroma The desired chroma.
+    #  * @param lstars The desired L* of each color.
+    #  * @return A list with the hexadecimal of each sRGB color.
+    #  */
+    @staticmethod
+    def solveToInts(hueDegrees, chroma, lstars):
+        hueDegrees = sanitizeDegreesDouble(hueDegrees)
+        hueRadians = hueDegrees / 180 * math.pi
+        hueTerms = HctSolver.hueTerms(hueRadians)
+        answers = []
+        for lstar in lstars:
+            if (chroma < 0.0001 or lstar < 0.0001 or lstar > 99.9999):
+                answers.append(argbFromLstar(lstar))
+                continue
+            y = yFromLstar(lstar)
+            exactAnswer = HctSolver.findResultByJ(hueRadians, chroma, y, hueTerms)
+            if (exactAnswer != 0):
+                answers.append(exactAnswer)
+                continue
+            linrgb = HctSolver.bisectToLimit(y, hueRadians)
+            answers.append(argbFromLinrgb(linrgb))
+        return answers
+
+    # /**
+    #  * Finds a CAM16 object with the given hue, chroma, and L*, if possible.
+    #  *
+    #  * @param hueDegrees The desired hue, in degrees.
+    #  * @param chroma The desired chroma.
+    #  * @param lstar The desired L*.
+    #  * @return A CAM16 object representing the sRGB color. The color has
+    #  *     sufficiently close hue, chroma, and L* to the desired values, if
+    #  *     possible; otherwise, the hue and L* will be sufficiently close, and
+    #  *     chroma will be maximized.
+    #  */
+    @staticmethod
+    def solveToCam(hueDegrees, chroma, lstar):
+        return Cam16.fromInt(HctSolver.solveToInt(hueDegrees, chroma, lstar))
+
+HctSolver.SCALED_DISCOUNT_FROM_LINRGB = scaledDiscountFromLinrgb(ViewingConditions.DEFAULT)
+HctSolver.LINRGB_FROM_SCALED_DISCOUNT = matrixInverse(HctSolver.SCALED_DISCOUNT_FROM_LINRGB)
+HctSolver.Y_FROM_LINRGB = SRGB_TO_XYZ[1]
+# /**
+#  * Linear RGB components at the middle of every pair of consecutive 8-bit
+#  * channel values, where the delinearized channel rounds to the next value.
+#  */
+HctSolver.CRITICAL_PLANES = [linearized(i + 0.5) for i in range(255)]
@@ -34,6 +34,15 @@ class ViewingConditions:
         self.fl = fl
         self.fLRoot = fLRoot
         self.z = z
+        # Expressions of the CAM16 transforms that only depend on the viewing
+        # conditions, computed the same way the transforms used to, so the
+        # results do not change by a single bit
+        self.alphaFactor = pow(1.64 - pow(0.29, n), 0.73)
+        self.jExponent = c * z
+        self.jExponentInverse = 1.0 / c / z
+        self.qFactor = 4.0 / c
+        self.awPlus4 = aw + 4.0
+        self.flScale = 100.0 / fl
 
     # /**
     #  * Create ViewingConditions from a simple, physically relevant, set of
@@ -1,6 +1,13 @@
 from ..hct.hct import *
+from ..hct.hct_solver import *
 from collections import OrderedDict
 
+# /**
+#  * Number of tones remembered by each palette, the least recently used tone
+#  * is evicted first. A scheme uses about 15 tones of its busiest palette.
+#  */
+TONE_CACHE_SIZE = 32
+
 # /**
 #  *  A convenience class for retrieving colors that are constant in hue and
 #  *  chroma, but vary in tone.
@@ -35,10 +42,34 @@ class TonalPalette:
     #  * @return ARGB representation of a color with that tone.
     #  */
     def tone(self, tone):
-        argb = None
-        if (tone not in self.cache.keys()):
-            argb = Hct.fromHct(self.hue, self.chroma, tone).toInt()
-            self.cache[tone] = argb
-        else:
-            argb = self.cache[tone]
-        return argb
+        return self.tones([tone])[0]
+
+    # /**
+    #  * @param tones HCT tones, measured from 0 to 100.
+    #  * @return ARGB representation of a color with each tone. The tones
+    #  *     that are not cached yet are solved together, sharing the work that
+    #  *     only depends on the hue and chroma of the palette.
+    #  */
+    def tones(self, tones):
+        # Tones are clamped like Hct does, so 40, 40.0 and out of range
+        # duplicates share an entry
+        keys = [clampDouble(0.0, 100.0, tone) for tone in tones]
+        argbs = {}
+        missing = []
+        for key in keys:
+            if (key in argbs):
+                continue
+            argb = self.cache.get(key)
+            if (argb is None):
+                missing.append(key)
+                argbs[key] = None
+            else:
+                self.cache.move_to_end(key)
+                argbs[key] = argb
+        if (len(missing) > 0):
+            for key, argb in zip(missing, HctSolver.solveToInts(self.hue, self.chroma, missing)):
+                argbs[key] = argb
+                self.cache[key] = argb
+            while (len(self.cache) > TONE_CACHE_SIZE):
+                self.cache.popitem(last = False)
+        return [argbs[key] for key in keys]
@@ -19,7 +19,7 @@ from ..quantize.quantizer_wu import *
 # // tslint:disable-next-line:class-as-namespace
 class QuantizerCelebi:
     # /**
-    #  * @param pixels Colors in ARGB format.
+    #  * @param pixels Colors in ARGB format, as a list or a uint32 array.
     #  * @param maxColors The number of colors to divide the image into. A lower
     #  *     number of colors may be returned.
     #  * @return Map with keys of colors in ARGB format, and values of number of
@@ -28,6 +28,9 @@ class QuantizerCelebi:
     #  */
     @staticmethod
     def quantize(pixels, maxColors):
+        # Dedupe the pixels once, Wu only reads the opaque colors while
+        # Wsmeans counts every pixel
+        histogram = QuantizerMap.histogram(pixels, False)
         wu = QuantizerWu()
-        wuResult = wu.quantize(pixels, maxColors)
-        return QuantizerWsmeans.quantize(pixels, wuResult, maxColors)
+        wuResult = wu.quantize(pixels, maxColors, QuantizerMap.opaque(histogram))
+        return QuantizerWsmeans.quantize(pixels, wuResult, maxColors, histogram)
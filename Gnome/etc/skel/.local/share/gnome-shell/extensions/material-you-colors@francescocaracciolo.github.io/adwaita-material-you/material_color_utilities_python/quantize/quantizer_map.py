@@ -1,5 +1,6 @@
 from ..utils.color_utils import *
 from collections import OrderedDict
+import numpy as np
 
 # /**
 #  * Quantizes an image into a map, with keys of ARGB colors, and values of the
@@ -12,17 +13,41 @@ from collections import OrderedDict
 # // tslint:disable-next-line:class-as-namespace
 class QuantizerMap:
     # /**
-    #  * @param pixels Colors in ARGB format.
+    #  * @param pixels Colors in ARGB format, as a list or a uint32 array.
     #  * @return A Map with keys of ARGB colors, and values of the number of times
     #  *     the color appears in the image.
     #  */
     @staticmethod
     def quantize(pixels):
-        countByColor = OrderedDict()
-        for i in range(len(pixels)):
-            pixel = pixels[i]
-            alpha = alphaFromArgb(pixel)
-            if (alpha < 255):
-                continue
-            countByColor[pixel] = (countByColor[pixel] if pixel in countByColor.keys() else 0) + 1
-        return countByColor
+        colors, counts = QuantizerMap.histogram(pixels)
+        return OrderedDict(zip(colors.tolist(), counts.tolist()))
+
+    # /**
+    #  * @param pixels Colors in ARGB format, as a list or a uint32 array.
+    #  * @param opaqueOnly Whether pixels with an alpha below 255 are skipped, as
+    #  *     quantize() does. Wsmeans counts every pixel, translucent ones
+    #  *     included.
+    #  * @return Parallel arrays of the distinct colors in ARGB format (uint32),
+    #  *     in order of first appearance, and of the number of times each color
+    #  *     appears in the image (int64).
+    #  */
+    @staticmethod
+    def histogram(pixels, opaqueOnly=True):
+        pixels = np.asarray(pixels, dtype=np.uint32)
+        if opaqueOnly:
+            pixels = pixels[pixels >= np.uint32(0xFF000000)]
+        colors, firstIndices, counts = np.unique(pixels, return_index=True, return_counts=True)
+        # np.unique sorts by value, put the colors back in the order they first
+        # appear so the result matches the insertion order of the Map version
+        order = np.argsort(firstIndices, kind="stable")
+        return colors[order], counts[order]
+
+    # /**
+    #  * @param histogram Result of histogram(pixels, False).
+    #  * @return The histogram of the opaque pixels only, as histogram(pixels).
+    #  */
+    @staticmethod
+    def opaque(histogram):
+        colors, counts = histogram
+        mask = colors >= np.uint32(0xFF000000)
+        return colors[mask], counts[mask]
@@ -1,10 +1,15 @@
 from ..quantize.lab_point_provider import *
+from ..quantize.quantizer_map import *
 from collections import OrderedDict
+import numpy as np
 import random
 import math
 
 MAX_ITERATIONS = 10
 MIN_MOVEMENT_DISTANCE = 3.0
+# Points are assigned to clusters this many at a time, bounding the point to
+# cluster distance matrix to DISTANCE_BLOCK_SIZE x maxColors entries
+DISTANCE_BLOCK_SIZE = 4096
 
 # /**
 #  * An image quantizer that improves on the speed of a standard K-Means algorithm
@@ -25,7 +30,7 @@ MIN_MOVEMENT_DISTANCE = 3.0
 # // tslint:disable-next-line:class-as-namespace
 class QuantizerWsmeans:
     # /**
-    #  * @param inputPixels Colors in ARGB format.
+    #  * @param inputPixels Colors in ARGB format, as a list or a uint32 array.
     #  * @param startingClusters Defines the initial state of the quantizer. Passing
     #  *     an empty array is fine, the implementation will create its own initial
     #  *     state that leads to reproducible results for the same inputs.
@@ -33,32 +38,25 @@ class QuantizerWsmeans:
     #  *     quality results.
     #  * @param maxColors The number of colors to divide the image into. A lower
     #  *     number of colors may be returned.
+    #  * @param histogram Optional result of
+    #  *     QuantizerMap.histogram(inputPixels, False), to reuse a histogram
+    #  *     that was already computed. Translucent pixels are counted too.
+    #  * @param stats Optional WsmeansStats, filled with the number of iterations
+    #  *     and of point to cluster distances evaluated and skipped.
     #  * @return Colors in ARGB format.
     #  */
     # Replacing Map() with OrderedDict()
     @staticmethod
-    def quantize(inputPixels, startingClusters, maxColors):
+    def quantize(inputPixels, startingClusters, maxColors, histogram = None, stats = None):
         random.seed(69)
-        pixelToCount = OrderedDict()
-        points = []
-        pixels = []
         pointProvider = LabPointProvider()
-        pointCount = 0
-        for i in range(len(inputPixels)):
-            inputPixel = inputPixels[i]
-            if (inputPixel not in pixelToCount.keys()):
-                pointCount += 1
-                points.append(pointProvider.fromInt(inputPixel))
-                pixels.append(inputPixel)
-                pixelToCount[inputPixel] = 1
-            else:
-                pixelToCount[inputPixel] = pixelToCount[inputPixel] + 1
-        counts = []
-        for i in range(pointCount):
-            pixel = pixels[i]
-            if (pixel in pixelToCount.keys()):
-                # counts[i] = pixelToCount[pixel]
-                counts.append(pixelToCount[pixel])
+        uniqueColors, uniqueCounts = histogram if histogram is not None else QuantizerMap.histogram(inputPixels, False)
+        pixels = uniqueColors.tolist()
+        pointCount = len(pixels)
+        if (pointCount == 0):
+            return OrderedDict()
+        points = np.array([pointProvider.fromInt(pixel) for pixel in pixels], dtype = np.float64)
+        counts = uniqueCounts.astype(np.float64)
         clusterCount = min(maxColors, pointCount)
         if (len(startingClusters) > 0):
             clusterCount = min(clusterCount, len(startingClusters))
@@ -72,94 +70,105 @@ class QuantizerWsmeans:
                 a = random.uniform(0, 1) * (100.0 - (-100.0) + 1) + -100
                 b = random.uniform(0, 1) * (100.0 - (-100.0) + 1) + -100
                 clusters.append([l, a, b])
-        clusterIndices = []
-        for i in range(pointCount):
-            clusterIndices.append(math.floor(random.uniform(0, 1) * clusterCount))
-        indexMatrix = []
-        for i in range(clusterCount):
-            indexMatrix.append([])
-            for j in range(clusterCount):
-                indexMatrix[i].append(0)
-        distanceToIndexMatrix = []
-        for i in range(clusterCount):
-            distanceToIndexMatrix.append([])
-            for j in range(clusterCount):
-                distanceToIndexMatrix[i].append(DistanceAndIndex())
-        pixelCountSums = []
-        for i in range(clusterCount):
-            pixelCountSums.append(0)
+        clusters = np.array(clusters[:clusterCount], dtype = np.float64)
+        clusterIndices = np.array([math.floor(random.uniform(0, 1) * clusterCount) for i in range(pointCount)], dtype = np.int64)
+        pixelCountSums = np.zeros(clusterCount)
+        if (stats is None):
+            stats = WsmeansStats()
         for iteration in range(MAX_ITERATIONS):
-            for i in range(clusterCount):
-                for j in range(i + 1, clusterCount):
-                    distance = pointProvider.distance(clusters[i], clusters[j])
-                    distanceToIndexMatrix[j][i].distance = distance
-                    distanceToIndexMatrix[j][i].index = i
-                    distanceToIndexMatrix[i][j].distance = distance
-                    distanceToIndexMatrix[i][j].index = j
-                # This sort here doesn't seem to do anything because arr of objects
-                # leaving just in case though
-                # distanceToIndexMatrix[i].sort()
-                for j in range(clusterCount):
-                    indexMatrix[i][j] = distanceToIndexMatrix[i][j].index
+            stats.iterations += 1
+            # Row i of indexMatrix lists the clusters by increasing distance from
+            # cluster i, distanceToIndexMatrix holds the matching distances
+            clusterDistances = QuantizerWsmeans.distances(clusters, clusters)
+            indexMatrix = np.argsort(clusterDistances, axis = 1, kind = "stable")
+            distanceToIndexMatrix = np.take_along_axis(clusterDistances, indexMatrix, axis = 1)
+            # Clusters stay fixed during a pass, so the points of each previous
+            # cluster can be assigned together, a block at a time
             pointsMoved = 0
-            for i in range(pointCount):
-                point = points[i]
-                previousClusterIndex = clusterIndices[i]
-                previousCluster = clusters[previousClusterIndex]
-                previousDistance = pointProvider.distance(point, previousCluster)
-                minimumDistance = previousDistance
-                newClusterIndex = -1
-                for j in range(clusterCount):
-                    if (distanceToIndexMatrix[previousClusterIndex][j].distance >= 4 * previousDistance):
-                        continue
-                    distance = pointProvider.distance(point, clusters[j])
-                    if (distance < minimumDistance):
-                        minimumDistance = distance
-                        newClusterIndex = j
-                if (newClusterIndex != -1):
-                    distanceChange = abs((math.sqrt(minimumDistance) - math.sqrt(previousDistance)))
-                    if (distanceChange > MIN_MOVEMENT_DISTANCE):
-                        pointsMoved += 1
-                        clusterIndices[i] = newClusterIndex
+            pointsByCluster = np.argsort(clusterIndices, kind = "stable")
+            clusterSizes = np.bincount(clusterIndices, minlength = clusterCount)
+            clusterEnds = np.cumsum(clusterSizes).tolist()
+            clusterStarts = (np.cumsum(clusterSizes) - clusterSizes).tolist()
+            for previousClusterIndex in range(clusterCount):
+                clusterEnd = clusterEnds[previousClusterIndex]
+                for start in range(clusterStarts[previousClusterIndex], clusterEnd, DISTANCE_BLOCK_SIZE):
+                    members = pointsByCluster[start:min(start + DISTANCE_BLOCK_SIZE, clusterEnd)]
+                    pointsMoved += QuantizerWsmeans.reassign(points[members], members, previousClusterIndex, clusters, indexMatrix, distanceToIndexMatrix, clusterIndices, stats)
             if (pointsMoved == 0 and iteration != 0):
                 break
-            componentASums = [0] * clusterCount
-            componentBSums = [0] * clusterCount
-            componentCSums = [0] * clusterCount
-            for i in range(clusterCount):
-                pixelCountSums[i] = 0
-            for i in range(pointCount):
-                clusterIndex = clusterIndices[i]
-                point = points[i]
-                count = counts[i]
-                pixelCountSums[clusterIndex] += count
-                componentASums[clusterIndex] += (point[0] * count)
-                componentBSums[clusterIndex] += (point[1] * count)
-                componentCSums[clusterIndex] += (point[2] * count)
-            for i in range(clusterCount):
-                count = pixelCountSums[i]
-                if (count == 0):
-                    clusters[i] = [0.0, 0.0, 0.0]
-                    continue
-                a = componentASums[i] / count
-                b = componentBSums[i] / count
-                c = componentCSums[i] / count
-                clusters[i] = [a, b, c]
+            # bincount adds the weights in point order, the same order as a
+            # running sum over the points
+            pixelCountSums = np.bincount(clusterIndices, weights = counts, minlength = clusterCount)
+            for component in range(3):
+                componentSums = np.bincount(clusterIndices, weights = points[:, component] * counts, minlength = clusterCount)
+                with np.errstate(divide = "ignore", invalid = "ignore"):
+                    clusters[:, component] = np.where(pixelCountSums == 0, 0.0, componentSums / pixelCountSums)
         argbToPopulation = OrderedDict()
         for i in range(clusterCount):
-            count = pixelCountSums[i]
+            count = int(pixelCountSums[i])
             if (count == 0):
                 continue
-            possibleNewCluster = pointProvider.toInt(clusters[i])
+            possibleNewCluster = pointProvider.toInt(clusters[i].tolist())
             if (possibleNewCluster in argbToPopulation.keys()):
                 continue
             argbToPopulation[possibleNewCluster] = count
         return argbToPopulation
 
+    # /**
+    #  * Moves points that all belong to the same cluster to their nearest
+    #  * cluster, using the triangle inequality to skip clusters that can not be
+    #  * closer: if d(previous, j) >= 4 * d(point, previous), in squared
+    #  * distances, then d(point, j) >= d(point, previous). Since the neighbours
+    #  * of the previous cluster are sorted by distance, the search stops at the
+    #  * first neighbour past that bound.
+    #  *
+    #  * @return The number of points moved.
+    #  */
+    @staticmethod
+    def reassign(block, members, previousClusterIndex, clusters, indexMatrix, distanceToIndexMatrix, clusterIndices, stats):
+        clusterCount = len(clusters)
+        previousDistance = QuantizerWsmeans.distances(block, clusters[previousClusterIndex:previousClusterIndex + 1])[:, 0]
+        # Number of sorted neighbours within the bound of each point, the first
+        # one is the previous cluster itself
+        candidateCounts = np.searchsorted(distanceToIndexMatrix[previousClusterIndex], 4 * previousDistance, side = "left")
+        searchLength = int(candidateCounts.max())
+        stats.distanceEvaluations += len(block) * searchLength
+        stats.skippedDistanceEvaluations += len(block) * (clusterCount - searchLength)
+        if (searchLength <= 1):
+            return 0
+        candidates = indexMatrix[previousClusterIndex, :searchLength]
+        distances = QuantizerWsmeans.distances(block, clusters[candidates])
+        distances[np.arange(searchLength)[None, :] >= candidateCounts[:, None]] = np.inf
+        minimumDistance = distances.min(axis = 1)
+        # Among equally close clusters pick the lowest index, like a scan that
+        # only moves on a strictly smaller distance
+        newClusterIndices = np.where(distances == minimumDistance[:, None], candidates[None, :], clusterCount).min(axis = 1)
+        distanceChange = np.abs(np.sqrt(minimumDistance) - np.sqrt(previousDistance))
+        moved = (minimumDistance < previousDistance) & (distanceChange > MIN_MOVEMENT_DISTANCE)
+        clusterIndices[members[moved]] = newClusterIndices[moved]
+        return int(np.count_nonzero(moved))
+
+    # /**
+    #  * @param points N x 3 array of L*a*b* points.
+    #  * @param clusters K x 3 array of L*a*b* cluster centers.
+    #  * @return N x K array of the squared distances from every point to every
+    #  *     cluster, computed like LabPointProvider.distance.
+    #  */
+    @staticmethod
+    def distances(points, clusters):
+        dL = points[:, None, 0] - clusters[None, :, 0]
+        dA = points[:, None, 1] - clusters[None, :, 1]
+        dB = points[:, None, 2] - clusters[None, :, 2]
+        return dL * dL + dA * dA + dB * dB
+
 # /**
-#  *  A wrapper for maintaining a table of distances between K-Means clusters.
+#  * Counters filled by QuantizerWsmeans.quantize, to measure how much work the
+#  * triangle inequality saves on real images.
 #  */
-class DistanceAndIndex:
+class WsmeansStats:
     def __init__(self):
-        self.distance = -1
-        self.index = -1
+        self.iterations = 0
+        # Point to cluster distances computed while searching for the nearest
+        # cluster, and those skipped because they were past the bound
+        self.distanceEvaluations = 0
+        self.skippedDistanceEvaluations = 0
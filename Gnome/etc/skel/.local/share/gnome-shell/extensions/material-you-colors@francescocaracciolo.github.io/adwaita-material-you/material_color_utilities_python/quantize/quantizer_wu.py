@@ -1,5 +1,7 @@
 from ..utils.color_utils import *
 from ..quantize.quantizer_map import *
+import heapq
+import numpy as np
 
 INDEX_BITS = 5
 SIDE_LENGTH = 33 # ((1 << INDEX_INDEX_BITS) + 1)
@@ -31,69 +33,51 @@ class QuantizerWu:
     #  * @param pixels Colors in ARGB format.
     #  * @param maxColors The number of colors to divide the image into. A lower
     #  *     number of colors may be returned.
+    #  * @param histogram Optional result of QuantizerMap.histogram(pixels), to
+    #  *     reuse a histogram that was already computed.
     #  * @return Colors in ARGB format.
     #  */
-    def quantize(self, pixels, maxColors):
-        self.constructHistogram(pixels)
+    def quantize(self, pixels, maxColors, histogram = None):
+        self.constructHistogram(pixels, histogram)
         self.computeMoments()
         createBoxesResult = self.createBoxes(maxColors)
         results = self.createResult(createBoxesResult.resultCount)
         return results
 
-    def constructHistogram(self, pixels):
-        _a = None
-        self.weights = [0] * TOTAL_SIZE
-        self.momentsR = [0] * TOTAL_SIZE
-        self.momentsG = [0] * TOTAL_SIZE
-        self.momentsB = [0] * TOTAL_SIZE
-        self.moments = [0] * TOTAL_SIZE
-        countByColor = QuantizerMap.quantize(pixels)
-        for (pixel, count) in countByColor.items():
-            red = redFromArgb(pixel)
-            green = greenFromArgb(pixel)
-            blue = blueFromArgb(pixel)
-            bitsToRemove = 8 - INDEX_BITS
-            iR = (red >> bitsToRemove) + 1
-            iG = (green >> bitsToRemove) + 1
-            iB = (blue >> bitsToRemove) + 1
-            index = self.getIndex(iR, iG, iB)
-            self.weights[index] = (self.weights[index] if len(self.weights) > index else 0) + count
-            self.momentsR[index] += count * red
-            self.momentsG[index] += count * green
-            self.momentsB[index] += count * blue
-            self.moments[index] += count * (red * red + green * green + blue * blue)
+    # The histogram and its moments are SIDE_LENGTH^3 arrays indexed by
+    # [r, g, b], with 5 bits per channel shifted by one so that the r, g or b
+    # index 0 planes stay empty and act as the origin of the prefix sums.
+    def constructHistogram(self, pixels, histogram = None):
+        colors, counts = histogram if histogram is not None else QuantizerMap.histogram(pixels)
+        colors = colors.astype(np.int64)
+        red = (colors >> 16) & 0xFF
+        green = (colors >> 8) & 0xFF
+        blue = colors & 0xFF
+        bitsToRemove = 8 - INDEX_BITS
+        iR = (red >> bitsToRemove) + 1
+        iG = (green >> bitsToRemove) + 1
+        iB = (blue >> bitsToRemove) + 1
+        index = (iR * SIDE_LENGTH + iG) * SIDE_LENGTH + iB
+        # Every sum is an integer below 2^53, so bincount's float64 accumulator
+        # is exact
+        def accumulate(values):
+            return np.bincount(index, weights = counts * values, minlength = TOTAL_SIZE).astype(np.int64).reshape(SIDE_LENGTH, SIDE_LENGTH, SIDE_LENGTH)
+        self.weights = accumulate(1)
+        self.momentsR = accumulate(red)
+        self.momentsG = accumulate(green)
+        self.momentsB = accumulate(blue)
+        self.moments = accumulate(red * red + green * green + blue * blue)
 
+    # Turns the histogram into cumulative moments, where [r, g, b] holds the
+    # sum of every cell in the box from [0, 0, 0] to [r, g, b] inclusive.
     def computeMoments(self):
-        for r in range(1, SIDE_LENGTH):
-            area = [0] * SIDE_LENGTH
-            areaR = [0] * SIDE_LENGTH
-            areaG = [0] * SIDE_LENGTH
-            areaB = [0] * SIDE_LENGTH
-            area2 = [0.0] * SIDE_LENGTH
-            for g in range(1, SIDE_LENGTH):
-                line = 0
-                lineR = 0
-                lineG = 0
-                lineB = 0
-                line2 = 0.0
-                for b in range(1, SIDE_LENGTH):
-                    index = self.getIndex(r, g, b)
-                    line += self.weights[index]
-                    lineR += self.momentsR[index]
-                    lineG += self.momentsG[index]
-                    lineB += self.momentsB[index]
-                    line2 += self.moments[index]
-                    area[b] += line
-                    areaR[b] += lineR
-                    areaG[b] += lineG
-                    areaB[b] += lineB
-                    area2[b] += line2
-                    previousIndex = self.getIndex(r - 1, g, b)
-                    self.weights[index] = self.weights[previousIndex] + area[b]
-                    self.momentsR[index] = self.momentsR[previousIndex] + areaR[b]
-                    self.momentsG[index] = self.momentsG[previousIndex] + areaG[b]
-                    self.momentsB[index] = self.momentsB[previousIndex] + areaB[b]
-                    self.moments[index] = self.moments[previousIndex] + area2[b]
+        def cumulate(moment):
+            return moment.cumsum(axis = -3).cumsum(axis = -2).cumsum(axis = -1)
+        # Weights and first moments share one [4, r, g, b] array, so a box cut
+        # reads all four of them with a single slice
+        self.cumulative = cumulate(np.stack([self.weights, self.momentsR, self.momentsG, self.momentsB], axis = 0))
+        self.weights, self.momentsR, self.momentsG, self.momentsB = self.cumulative
+        self.moments = cumulate(self.moments).astype(np.float64)
 
     def createBoxes(self, maxColors):
         self.cubes = [Box() for x in [0] * maxColors]
@@ -106,6 +90,12 @@ class QuantizerWu:
         self.cubes[0].b1 = SIDE_LENGTH - 1
         generatedColorCount = maxColors
         next = 0
+        # Max-heap of (-variance, box index). An entry is stale once its variance
+        # no longer matches volumeVariance, and is dropped when it reaches the
+        # top. Box 0 is always a candidate, box j > 0 joins once j < i, so the
+        # box created by a cut is only considered from the next iteration on.
+        candidates = [(-volumeVariance[0], 0)]
+        candidateBound = 1
         for i in range(1, maxColors):
             if (self.cut(self.cubes[next], self.cubes[i])):
                 volumeVariance[next] = self.variance(self.cubes[next]) if self.cubes[next].vol > 1 else 0.0
@@ -113,12 +103,15 @@ class QuantizerWu:
             else:
                 volumeVariance[next] = 0.0
                 i -= 1
-            next = 0
-            temp = volumeVariance[0]
-            for j in range(1, i):
-                if (volumeVariance[j] > temp):
-                    temp = volumeVariance[j]
-                    next = j
+            heapq.heappush(candidates, (-volumeVariance[next], next))
+            while (candidateBound < i):
+                heapq.heappush(candidates, (-volumeVariance[candidateBound], candidateBound))
+                candidateBound += 1
+            while (-candidates[0][0] != volumeVariance[candidates[0][1]]):
+                heapq.heappop(candidates)
+            # Ties go to the lowest index, like a linear scan would
+            temp = -candidates[0][0]
+            next = candidates[0][1]
             if (temp <= 0.0):
                 generatedColorCount = i + 1
                 break
@@ -128,32 +121,27 @@ class QuantizerWu:
         colors = []
         for i in range(colorCount):
             cube = self.cubes[i]
-            weight = self.volume(cube, self.weights)
+            weight, momentR, momentG, momentB = self.volume(cube, self.cumulative).tolist()
             if (weight > 0):
-                r = round(self.volume(cube, self.momentsR) / weight)
-                g = round(self.volume(cube, self.momentsG) / weight)
-                b = round(self.volume(cube, self.momentsB) / weight)
+                r = round(momentR / weight)
+                g = round(momentG / weight)
+                b = round(momentB / weight)
                 color = (255 << 24) | ((r & 0x0ff) << 16) | ((g & 0x0ff) << 8) | (b & 0x0ff)
                 colors.append(color)
         return colors
 
     def variance(self, cube):
-        dr = self.volume(cube, self.momentsR)
-        dg = self.volume(cube, self.momentsG)
-        db = self.volume(cube, self.momentsB)
-        xx = self.moments[self.getIndex(cube.r1, cube.g1, cube.b1)] - self.moments[self.getIndex(cube.r1, cube.g1, cube.b0)] - self.moments[self.getIndex(cube.r1, cube.g0, cube.b1)] + self.moments[self.getIndex(cube.r1, cube.g0, cube.b0)] - self.moments[self.getIndex(cube.r0, cube.g1, cube.b1)] + self.moments[self.getIndex(cube.r0, cube.g1, cube.b0)] + self.moments[self.getIndex(cube.r0, cube.g0, cube.b1)] - self.moments[self.getIndex(cube.r0, cube.g0, cube.b0)]
+        # tolist() gives Python ints, squares of large moments overflow int64
+        volume, dr, dg, db = self.volume(cube, self.cumulative).tolist()
+        xx = float(self.volume(cube, self.moments))
         hypotenuse = dr * dr + dg * dg + db * db
-        volume = self.volume(cube, self.weights)
         return xx - hypotenuse / volume
 
     def cut(self, one, two):
-        wholeR = self.volume(one, self.momentsR)
-        wholeG = self.volume(one, self.momentsG)
-        wholeB = self.volume(one, self.momentsB)
-        wholeW = self.volume(one, self.weights)
-        maxRResult = self.maximize(one, directions["RED"], one.r0 + 1, one.r1, wholeR, wholeG, wholeB, wholeW)
-        maxGResult = self.maximize(one, directions["GREEN"], one.g0 + 1, one.g1, wholeR, wholeG, wholeB, wholeW)
-        maxBResult = self.maximize(one, directions["BLUE"], one.b0 + 1, one.b1, wholeR, wholeG, wholeB, wholeW)
+        whole = self.volume(one, self.cumulative)
+        maxRResult = self.maximize(one, directions["RED"], one.r0 + 1, one.r1, whole)
+        maxGResult = self.maximize(one, directions["GREEN"], one.g0 + 1, one.g1, whole)
+        maxBResult = self.maximize(one, directions["BLUE"], one.b0 + 1, one.b1, whole)
         direction = None
         maxR = maxRResult.maximum
         maxG = maxGResult.maximum
@@ -192,67 +180,53 @@ class QuantizerWu:
         two.vol = (two.r1 - two.r0) * (two.g1 - two.g0) * (two.b1 - two.b0)
         return True
 
-    def maximize(self, cube, direction, first, last, wholeR, wholeG, wholeB, wholeW):
-        bottomR = self.bottom(cube, direction, self.momentsR)
-        bottomG = self.bottom(cube, direction, self.momentsG)
-        bottomB = self.bottom(cube, direction, self.momentsB)
-        bottomW = self.bottom(cube, direction, self.weights)
-        max = 0.0
-        cut = -1
-        halfR = 0
-        halfG = 0
-        halfB = 0
-        halfW = 0
-        for i in range(first, last):
-            halfR = bottomR + self.top(cube, direction, i, self.momentsR)
-            halfG = bottomG + self.top(cube, direction, i, self.momentsG)
-            halfB = bottomB + self.top(cube, direction, i, self.momentsB)
-            halfW = bottomW + self.top(cube, direction, i, self.weights)
-            if (halfW == 0):
-                continue
-            tempNumerator = (halfR * halfR + halfG * halfG + halfB * halfB) * 1.0
-            tempDenominator = halfW * 1.0
-            temp = tempNumerator / tempDenominator
-            halfR = wholeR - halfR
-            halfG = wholeG - halfG
-            halfB = wholeB - halfB
-            halfW = wholeW - halfW
-            if (halfW == 0):
-                continue
-            tempNumerator = (halfR * halfR + halfG * halfG + halfB * halfB) * 1.0
-            tempDenominator = halfW * 1.0
-            temp += tempNumerator / tempDenominator
-            if (temp > max):
-                max = temp
-                cut = i
-        return MaximizeResult(cut, max)
+    # /**
+    #  * Evaluates every cut position in [first, last) along direction at once.
+    #  *
+    #  * @param whole [weight, r, g, b] moments of the whole cube.
+    #  */
+    def maximize(self, cube, direction, first, last, whole):
+        if (first >= last):
+            return MaximizeResult(-1, 0.0)
+        # Rows are weight, r, g and b, columns are the cut positions
+        bottom = self.bottom(cube, direction, self.cumulative)
+        half = (bottom[:, None] + self.top(cube, direction, slice(first, last), self.cumulative)).astype(np.float64)
+        rest = whole.astype(np.float64)[:, None] - half
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            temp = (half[1] * half[1] + half[2] * half[2] + half[3] * half[3]) / half[0]
+            temp += (rest[1] * rest[1] + rest[2] * rest[2] + rest[3] * rest[3]) / rest[0]
+        # Cuts leaving one side empty are skipped
+        temp = np.where((half[0] != 0) & (rest[0] != 0), temp, 0.0)
+        # argmax returns the first maximum, matching a scan that only moves on a
+        # strictly greater value
+        cut = int(np.argmax(temp))
+        if (temp[cut] > 0.0):
+            return MaximizeResult(first + cut, float(temp[cut]))
+        return MaximizeResult(-1, 0.0)
 
     def volume(self, cube, moment):
-        return (moment[self.getIndex(cube.r1, cube.g1, cube.b1)] - moment[self.getIndex(cube.r1, cube.g1, cube.b0)] - moment[self.getIndex(cube.r1, cube.g0, cube.b1)] + moment[self.getIndex(cube.r1, cube.g0, cube.b0)] - moment[self.getIndex(cube.r0, cube.g1, cube.b1)] + moment[self.getIndex(cube.r0, cube.g1, cube.b0)] + moment[self.getIndex(cube.r0, cube.g0, cube.b1)] - moment[self.getIndex(cube.r0, cube.g0, cube.b0)])
+        return (moment[..., cube.r1, cube.g1, cube.b1] - moment[..., cube.r1, cube.g1, cube.b0] - moment[..., cube.r1, cube.g0, cube.b1] + moment[..., cube.r1, cube.g0, cube.b0] - moment[..., cube.r0, cube.g1, cube.b1] + moment[..., cube.r0, cube.g1, cube.b0] + moment[..., cube.r0, cube.g0, cube.b1] - moment[..., cube.r0, cube.g0, cube.b0])
 
     def bottom(self, cube, direction, moment):
         if (direction == directions["RED"]):
-            return (-moment[self.getIndex(cube.r0, cube.g1, cube.b1)] + moment[self.getIndex(cube.r0, cube.g1, cube.b0)] + moment[self.getIndex(cube.r0, cube.g0, cube.b1)] - moment[self.getIndex(cube.r0, cube.g0, cube.b0)])
+            return (-moment[..., cube.r0, cube.g1, cube.b1] + moment[..., cube.r0, cube.g1, cube.b0] + moment[..., cube.r0, cube.g0, cube.b1] - moment[..., cube.r0, cube.g0, cube.b0])
         elif (direction == directions["GREEN"]):
-            return (-moment[self.getIndex(cube.r1, cube.g0, cube.b1)] + moment[self.getIndex(cube.r1, cube.g0, cube.b0)] + moment[self.getIndex(cube.r0, cube.g0, cube.b1)] - moment[self.getIndex(cube.r0, cube.g0, cube.b0)])
+            return (-moment[..., cube.r1, cube.g0, cube.b1] + moment[..., cube.r1, cube.g0, cube.b0] + moment[..., cube.r0, cube.g0, cube.b1] - moment[..., cube.r0, cube.g0, cube.b0])
         elif (direction == directions["BLUE"]):
-            return (-moment[self.getIndex(cube.r1, cube.g1, cube.b0)] + moment[self.getIndex(cube.r1, cube.g0, cube.b0)] + moment[self.getIndex(cube.r0, cube.g1, cube.b0)] - moment[self.getIndex(cube.r0, cube.g0, cube.b0)])
+            return (-moment[..., cube.r1, cube.g1, cube.b0] + moment[..., cube.r1, cube.g0, cube.b0] + moment[..., cube.r0, cube.g1, cube.b0] - moment[..., cube.r0, cube.g0, cube.b0])
         else:
             raise Exception('unexpected direction ' + direction)
 
     def top(self, cube, direction, position, moment):
         if (direction == directions["RED"]):
-            return (moment[self.getIndex(position, cube.g1, cube.b1)] - moment[self.getIndex(position, cube.g1, cube.b0)] - moment[self.getIndex(position, cube.g0, cube.b1)] + moment[self.getIndex(position, cube.g0, cube.b0)])
+            return (moment[..., position, cube.g1, cube.b1] - moment[..., position, cube.g1, cube.b0] - moment[..., position, cube.g0, cube.b1] + moment[..., position, cube.g0, cube.b0])
         elif (direction == directions["GREEN"]):
-            return (moment[self.getIndex(cube.r1, position, cube.b1)] - moment[self.getIndex(cube.r1, position, cube.b0)] - moment[self.getIndex(cube.r0, position, cube.b1)] + moment[self.getIndex(cube.r0, position, cube.b0)])
+            return (moment[..., cube.r1, position, cube.b1] - moment[..., cube.r1, position, cube.b0] - moment[..., cube.r0, position, cube.b1] + moment[..., cube.r0, position, cube.b0])
         elif (direction == directions["BLUE"]):
-            return (moment[self.getIndex(cube.r1, cube.g1, position)] - moment[self.getIndex(cube.r1, cube.g0, position)] - moment[self.getIndex(cube.r0, cube.g1, position)] + moment[self.getIndex(cube.r0, cube.g0, position)])
+            return (moment[..., cube.r1, cube.g1, position] - moment[..., cube.r1, cube.g0, position] - moment[..., cube.r0, cube.g1, position] + moment[..., cube.r0, cube.g0, position])
         else:
             raise Exception('unexpected direction ' + direction)
 
-    def getIndex(self, r, g, b):
-        return (r << (INDEX_BITS * 2)) + (r << (INDEX_BITS + 1)) + r + (g << INDEX_BITS) + g + b
-
 # /**
 #  * Keeps track of the state of each box created as the Wu  quantization
 #  * algorithm progresses through dividing the image's pixels as plotted in RGB.
@@ -2,9 +2,88 @@ import json
 
 from ..palettes.core_palette import *
 
+# /**
+#  * Palette of the CorePalette and tone used for each role of a light scheme.
+#  */
+LIGHT_SCHEME_TONES = {
+    "primary": ("a1", 80),
+    "onPrimary": ("a1", 20),
+    "primaryContainer": ("a1", 90),
+    "onPrimaryContainer": ("a1", 10),
+    "secondary": ("a2", 40),
+    "onSecondary": ("a2", 100),
+    "secondaryContainer": ("a2", 98),
+    "onSecondaryContainer": ("a2", 10),
+    "tertiary": ("a3", 40),
+    "onTertiary": ("a3", 100),
+    "tertiaryContainer": ("a3", 90),
+    "onTertiaryContainer": ("a3", 10),
+    "error": ("error", 60),
+    "onError": ("error", 100),
+    "errorContainer": ("error", 90),
+    "onErrorContainer": ("error", 10),
+    "background": ("n1", 97),
+    "onBackground": ("n1", 10),
+    "surface": ("n1", 97),
+    "onSurface": ("n1", 10),
+    "surfaceVariant": ("n2", 90),
+    "onSurfaceVariant": ("n2", 30),
+    "outline": ("n2", 50),
+    "shadow": ("n1", 0),
+    "inverseSurface": ("n1", 20),
+    "inverseOnSurface": ("n1", 95),
+    "inversePrimary": ("a1", 80),
+}
+
+# /**
+#  * Palette of the CorePalette and tone used for each role of a dark scheme.
+#  */
+DARK_SCHEME_TONES = {
+    "primary": ("a1", 80),
+    "onPrimary": ("a1", 20),
+    "primaryContainer": ("a1", 30),
+    "onPrimaryContainer": ("a1", 90),
+    "secondary": ("a2", 80),
+    "onSecondary": ("a2", 20),
+    "secondaryContainer": ("a2", 30),
+    "onSecondaryContainer": ("a2", 90),
+    "tertiary": ("a3", 80),
+    "onTertiary": ("a3", 20),
+    "tertiaryContainer": ("a3", 30),
+    "onTertiaryContainer": ("a3", 90),
+    "error": ("error", 80),
+    "onError": ("error", 20),
+    "errorContainer": ("error", 30),
+    "onErrorContainer": ("error", 80),
+    "background": ("n1", 10),
+    "onBackground": ("n1", 90),
+    "surface": ("n1", 10),
+    "onSurface": ("n1", 90),
+    # "surfaceVariant": ("n2", 20),
+    "surfaceVariant": ("n2", 15),
+    "onSurfaceVariant": ("n2", 80),
+    "outline": ("n2", 60),
+    "shadow": ("n1", 0),
+    "inverseSurface": ("n1", 90),
+    "inverseOnSurface": ("n1", 20),
+    "inversePrimary": ("a1", 40),
+}
+
+
+# /**
+#  * Colors of a scheme built for some roles only. Reading another role raises
+#  * a KeyError that names it, instead of a bare one.
+#  */
+class SchemeProps(dict):
+    def __missing__(self, role):
+        raise KeyError("Role " + repr(role) + " is not in this scheme, it was built for the roles " + ", ".join(self) + " only")
 
 # /**
 #  * Represents a Material color scheme, a mapping of color roles to colors.
+#  *
+#  * A scheme built with a collection of roles, see fromCorePalette, only
+#  * holds these roles. Reading any other role, through props or its
+#  * property, raises a KeyError.
 #  */
 # Using dictionary instead of JavaScript Object
 class Scheme:
@@ -126,38 +205,7 @@ class Scheme:
     #  */
     @staticmethod
     def light(argb):
-        core = CorePalette.of(argb)
-        return Scheme(
-            {
-                "primary": core.a1.tone(80),
-                "onPrimary": core.a1.tone(20),
-                "primaryContainer": core.a1.tone(90),
-                "onPrimaryContainer": core.a1.tone(10),
-                "secondary": core.a2.tone(40),
-                "onSecondary": core.a2.tone(100),
-                "secondaryContainer": core.a2.tone(98),
-                "onSecondaryContainer": core.a2.tone(10),
-                "tertiary": core.a3.tone(40),
-                "onTertiary": core.a3.tone(100),
-                "tertiaryContainer": core.a3.tone(90),
-                "onTertiaryContainer": core.a3.tone(10),
-                "error": core.error.tone(60),
-                "onError": core.error.tone(100),
-                "errorContainer": core.error.tone(90),
-                "onErrorContainer": core.error.tone(10),
-                "background": core.n1.tone(97),
-                "onBackground": core.n1.tone(10),
-                "surface": core.n1.tone(97),
-                "onSurface": core.n1.tone(10),
-                "surfaceVariant": core.n2.tone(90),
-                "onSurfaceVariant": core.n2.tone(30),
-                "outline": core.n2.tone(50),
-                "shadow": core.n1.tone(0),
-                "inverseSurface": core.n1.tone(20),
-                "inverseOnSurface": core.n1.tone(95),
-                "inversePrimary": core.a1.tone(80),
-            }
-        )
+        return Scheme.lightFromCorePalette(CorePalette.of(argb))
 
     # /**
     #  * @param argb ARGB representation of a color.
@@ -165,39 +213,54 @@ class Scheme:
     #  */
     @staticmethod
     def dark(argb):
-        core = CorePalette.of(argb)
-        return Scheme(
-            {
-                "primary": core.a1.tone(80),
-                "onPrimary": core.a1.tone(20),
-                "primaryContainer": core.a1.tone(30),
-                "onPrimaryContainer": core.a1.tone(90),
-                "secondary": core.a2.tone(80),
-                "onSecondary": core.a2.tone(20),
-                "secondaryContainer": core.a2.tone(30),
-                "onSecondaryContainer": core.a2.tone(90),
-                "tertiary": core.a3.tone(80),
-                "onTertiary": core.a3.tone(20),
-                "tertiaryContainer": core.a3.tone(30),
-                "onTertiaryContainer": core.a3.tone(90),
-                "error": core.error.tone(80),
-                "onError": core.error.tone(20),
-                "errorContainer": core.error.tone(30),
-                "onErrorContainer": core.error.tone(80),
-                "background": core.n1.tone(10),
-                "onBackground": core.n1.tone(90),
-                "surface": core.n1.tone(10),
-                "onSurface": core.n1.tone(90),
-                # "surfaceVariant": core.n2.tone(20),
-                "surfaceVariant": core.n2.tone(15),
-                "onSurfaceVariant": core.n2.tone(80),
-                "outline": core.n2.tone(60),
-                "shadow": core.n1.tone(0),
-                "inverseSurface": core.n1.tone(90),
-                "inverseOnSurface": core.n1.tone(20),
-                "inversePrimary": core.a1.tone(40),
-            }
-        )
+        return Scheme.darkFromCorePalette(CorePalette.of(argb))
+
+    # /**
+    #  * @param core CorePalette of the source color, can be shared with other
+    #  *     schemes of the same color.
+    #  * @param roles Optional collection of role names, only these roles are
+    #  *     computed, see fromCorePalette.
+    #  * @return Light Material color scheme.
+    #  */
+    @staticmethod
+    def lightFromCorePalette(core, roles = None):
+        return Scheme.fromCorePalette(core, LIGHT_SCHEME_TONES, roles)
+
+    # /**
+    #  * @param core CorePalette of the source color, can be shared with other
+    #  *     schemes of the same color.
+    #  * @param roles Optional collection of role names, only these roles are
+    #  *     computed, see fromCorePalette.
+    #  * @return Dark Material color scheme.
+    #  */
+    @staticmethod
+    def darkFromCorePalette(core, roles = None):
+        return Scheme.fromCorePalette(core, DARK_SCHEME_TONES, roles)
+
+    # /**
+    #  * @param core CorePalette of the source color.
+    #  * @param schemeTones Palette and tone of each role, LIGHT_SCHEME_TONES or
+    #  *     DARK_SCHEME_TONES.
+    #  * @param roles Optional collection of role names, only these roles are
+    #  *     computed, and the palettes none of them use are never solved.
+    #  *     Reading another role of the scheme raises a KeyError.
+    #  */
+    @staticmethod
+    def fromCorePalette(core, schemeTones, roles = None):
+        selected = [role for role in schemeTones if roles is None or role in roles]
+        # Solve the tones of each palette together
+        tonesByPalette = {}
+        for role in selected:
+            [palette, tone] = schemeTones[role]
+            tonesByPalette.setdefault(palette, []).append(tone)
+        argbsByPalette = {}
+        for palette, tones in tonesByPalette.items():
+            argbsByPalette[palette] = dict(zip(tones, getattr(core, palette).tones(tones)))
+        props = {} if roles is None else SchemeProps()
+        for role in selected:
+            [palette, tone] = schemeTones[role]
+            props[role] = argbsByPalette[palette][tone]
+        return Scheme(props)
 
     def toJSON(self):
         return json.dumps(self.props)
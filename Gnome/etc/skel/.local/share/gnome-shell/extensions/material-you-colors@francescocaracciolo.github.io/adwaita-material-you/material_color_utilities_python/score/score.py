@@ -2,6 +2,7 @@ from ..hct.cam16 import *
 from ..utils.color_utils import *
 from ..utils.math_utils import *
 from collections import OrderedDict
+import numpy as np
 
 # /**
 #  *  Given a large set of colors, remove colors that are unsuitable for a UI
@@ -30,6 +31,7 @@ class Score:
     # Using OrderedDict for JavaScript Map
     @staticmethod
     def score(colorsToPopulation):
+        colors = list(colorsToPopulation.keys())
         # // Determine the total count of all colors.
         populationSum = 0
         for population in colorsToPopulation.values():
@@ -37,50 +39,51 @@ class Score:
         # // Turn the count of each color into a proportion by dividing by the total
         # // count. Also, fill a cache of CAM16 colors representing each color, and
         # // record the proportion of colors for each CAM16 hue.
-        colorsToProportion = OrderedDict()
-        colorsToCam = OrderedDict()
-        hueProportions = [0] * 361
-        for (color, population) in colorsToPopulation.items():
-            proportion = population / populationSum
-            colorsToProportion[color] = proportion
-            cam = Cam16.fromInt(color)
-            colorsToCam[color] = cam
-            hue = round(cam.hue)
-            hueProportions[hue] += proportion
+        proportions = np.array(list(colorsToPopulation.values()), dtype = np.float64) / populationSum
+        # Hue, chroma and tone of every color at once. NumPy's transcendental
+        # functions can round differently from math's in the last bits, so
+        # a color sitting within ~1e-12 of a cutoff or of a hue bin boundary
+        # can land on the other side of it than with Cam16.fromInt
+        cams = Cam16Array.fromInts(colors)
+        hues = cams.hue
+        chromas = cams.chroma
+        tones = lstarsFromArgbs(colors)
+        hueBins = np.round(hues).astype(np.int64)
+        hueProportions = np.zeros(361)
+        # add.at accumulates in color order, like a running sum per hue
+        np.add.at(hueProportions, hueBins, proportions)
         # // Determine the proportion of the colors around each color, by summing the
         # // proportions around each color's hue.
-        colorsToExcitedProportion = OrderedDict()
-        for (color, cam) in colorsToCam.items():
-            hue = round(cam.hue)
-            excitedProportion = 0
-            for i in range((hue - 15), (hue + 15)):
-                neighborHue = sanitizeDegreesInt(i)
-                excitedProportion += hueProportions[neighborHue]
-            colorsToExcitedProportion[color] = excitedProportion
+        excitedProportions = Score.excitedProportions(hueProportions)[hueBins]
         # // Score the colors by their proportion, as well as how chromatic they are.
-        colorsToScore = OrderedDict()
-        for (color, cam) in colorsToCam.items():
-            proportion = colorsToExcitedProportion[color]
-            proportionScore = proportion * 100.0 * Score.WEIGHT_PROPORTION
-            chromaWeight = Score.WEIGHT_CHROMA_BELOW if cam.chroma < Score.TARGET_CHROMA else Score.WEIGHT_CHROMA_ABOVE
-            chromaScore = (cam.chroma - Score.TARGET_CHROMA) * chromaWeight
-            score = proportionScore + chromaScore
-            colorsToScore[color] = score
+        proportionScores = excitedProportions * 100.0 * Score.WEIGHT_PROPORTION
+        chromaWeights = np.where(chromas < Score.TARGET_CHROMA, Score.WEIGHT_CHROMA_BELOW, Score.WEIGHT_CHROMA_ABOVE)
+        chromaScores = (chromas - Score.TARGET_CHROMA) * chromaWeights
+        scores = (proportionScores + chromaScores).tolist()
         # // Remove colors that are unsuitable, ex. very dark or unchromatic colors.
         # // Also, remove colors that are very similar in hue.
-        filteredColors = Score.filter(colorsToExcitedProportion, colorsToCam)
+        filtered = Score.filter(excitedProportions, chromas, tones)
         dedupedColorsToScore = OrderedDict()
-        for color in filteredColors:
+        # The dedupe stays a loop, whether a color is kept depends on the
+        # colors kept before it
+        # Hues of the chosen colors by 15 degree bucket, a hue closer than 15
+        # degrees to another one can only be in its bucket or a neighbouring one
+        chosenHuesByBucket = [[] for bucket in range(24)]
+        for i in np.flatnonzero(filtered).tolist():
+            hue = hues[i].item()
+            bucket = int(hue // 15) % 24
             duplicateHue = False
-            hue = colorsToCam[color].hue
-            for alreadyChosenColor in dedupedColorsToScore:
-                alreadyChosenHue = colorsToCam[alreadyChosenColor].hue
-                if (differenceDegrees(hue, alreadyChosenHue) < 15):
-                    duplicateHue = True
+            for neighborBucket in (bucket - 1, bucket, (bucket + 1) % 24):
+                for alreadyChosenHue in chosenHuesByBucket[neighborBucket]:
+                    if (differenceDegrees(hue, alreadyChosenHue) < 15):
+                        duplicateHue = True
+                        break
+                if (duplicateHue):
                     break
             if (duplicateHue):
                 continue
-            dedupedColorsToScore[color] = colorsToScore[color]
+            chosenHuesByBucket[bucket].append(hue)
+            dedupedColorsToScore[colors[i]] = scores[i]
         # // Ensure the list of colors returned is sorted such that the first in the
         # // list is the most suitable, and the last is the least suitable.
         colorsByScoreDescending = list(dedupedColorsToScore.items())
@@ -91,16 +94,32 @@ class Score:
             answer.append(0xff4285F4) # // Google Blue
         return answer
 
+    # /**
+    #  * Circular convolution of the hue histogram with a 30 degree box, the
+    #  * proportion of colors with a hue in [hue - 15, hue + 15) for every
+    #  * rounded hue. The box is added one shift at a time, so every sum is
+    #  * accumulated in the same order as a loop over the neighbouring hues.
+    #  *
+    #  * @param hueProportions proportion of colors for each rounded hue, 361
+    #  *     entries since a hue can round up to 360.
+    #  */
+    @staticmethod
+    def excitedProportions(hueProportions):
+        hues = np.arange(361)
+        excitedProportions = np.zeros(361)
+        for offset in range(-15, 15):
+            excitedProportions += hueProportions[(hues + offset) % 360]
+        return excitedProportions
+
+    # /**
+    #  * @return Mask of the colors that are chromatic, light and common enough
+    #  *     to be a source color.
+    #  */
     @staticmethod
-    def filter(colorsToExcitedProportion, colorsToCam):
-        filtered = []
-        for (color, cam) in colorsToCam.items():
-            proportion = colorsToExcitedProportion[color]
-            if (cam.chroma >= Score.CUTOFF_CHROMA and
-                lstarFromArgb(color) >= Score.CUTOFF_TONE and
-                proportion >= Score.CUTOFF_EXCITED_PROPORTION):
-                filtered.append(color)
-        return filtered
+    def filter(excitedProportions, chromas, tones):
+        return ((chromas >= Score.CUTOFF_CHROMA) &
+            (tones >= Score.CUTOFF_TONE) &
+            (excitedProportions >= Score.CUTOFF_EXCITED_PROPORTION))
 
 Score.TARGET_CHROMA = 48.0
 Score.WEIGHT_PROPORTION = 0.7
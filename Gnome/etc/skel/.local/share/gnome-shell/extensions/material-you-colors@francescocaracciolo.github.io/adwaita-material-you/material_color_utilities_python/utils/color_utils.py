@@ -1,4 +1,6 @@
 from .math_utils import *
+from bisect import bisect_right
+import numpy as np
 import math
 
 # /**
@@ -77,18 +79,28 @@ def argbFromXyz(x, y, z):
     linearR = matrix[0][0] * x + matrix[0][1] * y + matrix[0][2] * z
     linearG = matrix[1][0] * x + matrix[1][1] * y + matrix[1][2] * z
     linearB = matrix[2][0] * x + matrix[2][1] * y + matrix[2][2] * z
-    r = delinearized(linearR)
-    g = delinearized(linearG)
-    b = delinearized(linearB)
-    return argbFromRgb(r, g, b)
+    # Same as delinearized(), looked up in DELINEARIZED_THRESHOLDS
+    r = bisect_right(DELINEARIZED_THRESHOLDS, linearR)
+    g = bisect_right(DELINEARIZED_THRESHOLDS, linearG)
+    b = bisect_right(DELINEARIZED_THRESHOLDS, linearB)
+    return 0xff000000 | r << 16 | g << 8 | b
+
+# /**
+#  * Converts a color from linear RGB components to ARGB format.
+#  */
+def argbFromLinrgb(linrgb):
+    r = bisect_right(DELINEARIZED_THRESHOLDS, linrgb[0])
+    g = bisect_right(DELINEARIZED_THRESHOLDS, linrgb[1])
+    b = bisect_right(DELINEARIZED_THRESHOLDS, linrgb[2])
+    return 0xff000000 | r << 16 | g << 8 | b
 
 # /**
 #  * Converts a color from XYZ to ARGB.
 #  */
 def xyzFromArgb(argb):
-    r = linearized(redFromArgb(argb))
-    g = linearized(greenFromArgb(argb))
-    b = linearized(blueFromArgb(argb))
+    r = LINEARIZED[argb >> 16 & 255]
+    g = LINEARIZED[argb >> 8 & 255]
+    b = LINEARIZED[argb & 255]
     return matrixMultiply([r, g, b], SRGB_TO_XYZ)
 
 # /**
@@ -133,9 +145,9 @@ def labF(t):
         return (kappa * t + 16) / 116
 
 def labFromArgb(argb):
-    linearR = linearized(redFromArgb(argb))
-    linearG = linearized(greenFromArgb(argb))
-    linearB = linearized(blueFromArgb(argb))
+    linearR = LINEARIZED[argb >> 16 & 255]
+    linearG = LINEARIZED[argb >> 8 & 255]
+    linearB = LINEARIZED[argb & 255]
     matrix = SRGB_TO_XYZ
     x = matrix[0][0] * linearR + matrix[0][1] * linearG + matrix[0][2] * linearB
     y = matrix[1][0] * linearR + matrix[1][1] * linearG + matrix[1][2] * linearB
@@ -180,7 +192,12 @@ def argbFromLstar(lstar):
 #  * @return L*, from L*a*b*, coordinate of the color
 #  */
 def lstarFromArgb(argb):
-    y = xyzFromArgb(argb)[1] / 100.0
+    # Only the Y row of SRGB_TO_XYZ is needed
+    linearR = LINEARIZED[argb >> 16 & 255]
+    linearG = LINEARIZED[argb >> 8 & 255]
+    linearB = LINEARIZED[argb & 255]
+    matrix = SRGB_TO_XYZ
+    y = (linearR * matrix[1][0] + linearG * matrix[1][1] + linearB * matrix[1][2]) / 100.0
     e = 216.0 / 24389.0
     if (y <= e):
         return 24389.0 / 27.0 * y
@@ -188,6 +205,22 @@ def lstarFromArgb(argb):
         yIntermediate = math.pow(y, 1.0 / 3.0)
         return 116.0 * yIntermediate - 16.0
 
+# /**
+#  * Computes the L* values of many colors at once, as lstarFromArgb does for
+#  * one. The cube root goes through np.power, so a value can differ from
+#  * lstarFromArgb in the last bits.
+#  *
+#  * @param argbs ARGB colors, as a list or a uint32 array.
+#  * @return float64 array of L*, 0 <= L* <= 100.
+#  */
+def lstarsFromArgbs(argbs):
+    argbs = np.asarray(argbs, dtype = np.uint32)
+    linear = np.array(LINEARIZED)
+    matrix = SRGB_TO_XYZ
+    y = (linear[(argbs >> 16) & 0xff] * matrix[1][0] + linear[(argbs >> 8) & 0xff] * matrix[1][1] + linear[argbs & 0xff] * matrix[1][2]) / 100.0
+    e = 216.0 / 24389.0
+    return np.where(y <= e, 24389.0 / 27.0 * y, 116.0 * np.power(y, 1.0 / 3.0) - 16.0)
+
 # /**
 #  * Converts an L* value to a Y value.
 #  *
@@ -247,6 +280,32 @@ def delinearized(rgbComponent):
 def whitePointD65():
     return WHITE_POINT_D65
 
+# /**
+#  * linearized() of every 8-bit channel value, indexed by the channel.
+#  */
+LINEARIZED = [linearized(i) for i in range(256)]
 
+# /**
+#  * Smallest linear RGB component that delinearizes to at least channel.
+#  *
+#  * Starts from the analytic inverse of the rounding boundary and walks to the
+#  * exact float, so the table agrees with delinearized() everywhere.
+#  */
+def delinearizedThreshold(channel):
+    normalized = (channel - 0.5) / 255.0
+    if (normalized <= 0.0031308 * 12.92):
+        threshold = normalized / 12.92 * 100.0
+    else:
+        threshold = math.pow((normalized + 0.055) / 1.055, 2.4) * 100.0
+    while (delinearized(threshold) >= channel):
+        threshold = math.nextafter(threshold, -math.inf)
+    while (delinearized(threshold) < channel):
+        threshold = math.nextafter(threshold, math.inf)
+    return threshold
 
-
+# /**
+#  * DELINEARIZED_THRESHOLDS[i] is the smallest linear RGB component that
+#  * delinearizes to i + 1, so bisect_right(DELINEARIZED_THRESHOLDS, component)
+#  * equals delinearized(component) for any component.
+#  */
+DELINEARIZED_THRESHOLDS = [delinearizedThreshold(channel) for channel in range(1, 256)]
@@ -5,6 +5,34 @@ from ..score.score import *
 from .color_utils import *
 
 
+def argbArrayFromImage(image, opaqueOnly=True):
+    """Convert an image to a flat array of ARGB pixels
+    Args:
+        image: PIL.Image
+        opaqueOnly: Whether pixels whose alpha is below 255 are filtered out
+
+    Returns:
+        numpy.ndarray: uint32 array of ARGB colors, in row-major order
+    """
+    if image.mode == "RGB":
+        image = image.convert("RGBA")
+    if image.mode != "RGBA":
+        print("Warning: Image not in RGB|RGBA format - Converting...")
+        image = image.convert("RGBA")
+
+    # View each RGBA pixel as a single little-endian uint32 (0xAABBGGRR), so
+    # the alpha filter and the channel swap to ARGB run as whole-array ops
+    rgba = np.asarray(image, dtype=np.uint8).reshape(-1, 4)
+    packed = np.ascontiguousarray(rgba).view("<u4").ravel()
+    if opaqueOnly:
+        packed = packed[packed >= 0xFF000000]
+    return (
+        (packed & np.uint32(0xFF00FF00))
+        | ((packed & np.uint32(0x000000FF)) << np.uint32(16))
+        | ((packed >> np.uint32(16)) & np.uint32(0x000000FF))
+    )
+
+
 # /**
 #  * Get the source color from an image.
 #  *
@@ -39,25 +67,7 @@ def sourceColorFromImage(image):
     #     const argb = argbFromRgb(r, g, b);
     #     pixels.push(argb);
     # }
-    if image.mode == "RGB":
-        image = image.convert("RGBA")
-    if image.mode != "RGBA":
-        print("Warning: Image not in RGB|RGBA format - Converting...")
-        image = image.convert("RGBA")
-
-    pixels = []
-    for x in range(image.width):
-        for y in range(image.height):
-            # for the given pixel at w,h, lets check its value against the threshold
-            pixel = image.getpixel((x, y))
-            r = pixel[0]
-            g = pixel[1]
-            b = pixel[2]
-            a = pixel[3]
-            if a < 255:
-                continue
-            argb = argbFromRgb(r, g, b)
-            pixels.append(argb)
+    pixels = argbArrayFromImage(image)
 
     # // Convert Pixels to Material Colors
     result = QuantizerCelebi.quantize(pixels, 128)
@@ -76,30 +86,9 @@ def topColorsFromImage(image) -> list[int]:
     Returns:
         list[str]: List of top 10 colors in hex format
     """
-    if image.mode == "RGB":
-        image = image.convert("RGBA")
-    if image.mode != "RGBA":
-        print("Warning: Image not in RGB|RGBA format - Converting...")
-        image = image.convert("RGBA")
-
-    pixel_array = np.array(image)
-    pixels = pixel_array.reshape(
-        -1, 4
-    )  # Reshape to a 2D array of shape (num_pixels, 4)
-
-    # Filter pixels based on alpha value and convert RGB to ARGB
-    valid_pixels = pixels[pixels[:, 3] == 255]
-    argb_pixels = np.empty((valid_pixels.shape[0],), dtype=np.uint32)
-    argb_pixels = np.zeros((valid_pixels.shape[0],), dtype=np.uint32)
-
-    argb_pixels |= valid_pixels[:, 3].astype(np.uint32) << 24
-    argb_pixels |= valid_pixels[:, 0].astype(np.uint32) << 16
-    argb_pixels |= valid_pixels[:, 1].astype(np.uint32) << 8
-    argb_pixels |= valid_pixels[:, 2].astype(np.uint32)
+    argb_pixels = argbArrayFromImage(image)
 
     # Quantize and score the pixels
-    argb_pixels = argb_pixels.tolist()
-
     result = QuantizerCelebi.quantize(argb_pixels, 128)
     ranked = Score.score(result)
     if len(ranked) > 10:
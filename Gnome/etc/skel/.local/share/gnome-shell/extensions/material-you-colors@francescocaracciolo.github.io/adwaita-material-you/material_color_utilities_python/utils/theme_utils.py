@@ -25,20 +25,21 @@ def customColor(source, color):
         value = Blend.harmonize(from_v, to)
     palette = CorePalette.of(value)
     tones = palette.a1
+    [light, onLight, lightContainer, onLightContainer, dark, onDark, darkContainer, onDarkContainer] = tones.tones([40, 100, 90, 10, 80, 20, 30, 90])
     return {
         "color": color,
         "value": value,
         "light": {
-            "color": tones.tone(40),
-            "onColor": tones.tone(100),
-            "colorContainer": tones.tone(90),
-            "onColorContainer": tones.tone(10),
+            "color": light,
+            "onColor": onLight,
+            "colorContainer": lightContainer,
+            "onColorContainer": onLightContainer,
         },
         "dark": {
-            "color": tones.tone(80),
-            "onColor": tones.tone(20),
-            "colorContainer": tones.tone(30),
-            "onColorContainer": tones.tone(90),
+            "color": dark,
+            "onColor": onDark,
+            "colorContainer": darkContainer,
+            "onColorContainer": onDarkContainer,
         },
     }
 
@@ -48,16 +49,22 @@ def customColor(source, color):
 #  *
 #  * @param source Source color
 #  * @param customColors Array of custom colors
+#  * @param roles Optional collection of scheme roles, for example the ones a
+#  *     color mapping references. Only these roles are computed in the
+#  *     schemes, reading another one raises a KeyError. The other tones of
+#  *     the palettes are solved on demand.
 #  * @return Theme object
 #  */
 # NOTE: Changes made to output format to be Dictionary
-def themeFromSourceColor(source: int, customColors=[]):
+def themeFromSourceColor(source: int, customColors=[], roles=None):
+    # One CorePalette feeds both schemes and the exported palettes, so each
+    # tone is solved once
     palette = CorePalette.of(source)
     return {
         "source": source,
         "schemes": {
-            "light": Scheme.light(source),
-            "dark": Scheme.dark(source),
+            "light": Scheme.lightFromCorePalette(palette, roles),
+            "dark": Scheme.darkFromCorePalette(palette, roles),
         },
         "palettes": {
             "primary": palette.a1,
@@ -0,0 +1,64 @@
+import hashlib
+import os
+import tempfile
+
+def content_digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+def write_atomic(path: str, data: bytes, mode: int = 0o644):
+    """Writes data to a temporary file next to path and renames it over path
+
+    A reader sees either the old or the new content, never half of it. The
+    temporary file is removed when anything fails, and the error is raised.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix="." + os.path.basename(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def file_digest(path: str):
+    """Digest of the content of a file, or None when it can't be read"""
+    try:
+        with open(path, "rb") as f:
+            return content_digest(f.read())
+    except OSError:
+        return None
+
+class OutputWriter:
+    """Writes generated files only when their content changes
+
+    Every running GTK application reloads gtk.css when it is written, so a file
+    whose content would stay the same is left alone. Changed files are written
+    to a temporary file in the same directory and renamed over the target, so a
+    reader sees either the old or the new content, never half of it.
+
+    touched and skipped count the files written and left alone.
+    """
+    def __init__(self):
+        self.touched = 0
+        self.skipped = 0
+
+    def write(self, path: str, content: str) -> bool:
+        """Writes content to path unless it already holds it, returns whether the file was written"""
+        # Replace the file a symlink points to, not the symlink
+        path = os.path.realpath(os.path.expanduser(path))
+        data = content.encode("utf-8")
+        if file_digest(path) == content_digest(data):
+            self.skipped += 1
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except OSError:
+            mode = 0o644
+        write_atomic(path, data, mode)
+        self.touched += 1
+        return True
+
+    def summary(self) -> str:
+        return str(self.touched) + " files written, " + str(self.skipped) + " unchanged"
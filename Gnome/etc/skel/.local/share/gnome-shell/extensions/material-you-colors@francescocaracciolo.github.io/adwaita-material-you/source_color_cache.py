@@ -0,0 +1,74 @@
+import hashlib
+import json
+import os
+from output_writer import write_atomic
+
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "adwaita-material-you")
+CACHE_FILE = "source_colors.json"
+# Maximum number of wallpapers remembered, the least recently used is evicted first
+MAX_ENTRIES = 64
+# Bump when the format of an entry changes, older cache files are discarded
+CACHE_VERSION = 1
+
+def file_fingerprint(path: str) -> str:
+    """Fingerprint of a file: its path, size, mtime and a hash of its content"""
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return os.path.abspath(path) + "|" + str(stat.st_size) + "|" + str(stat.st_mtime_ns) + "|" + digest.hexdigest()
+
+class SourceColorCache:
+    """On-disk LRU cache of the ranked source colors extracted from a wallpaper
+
+    Entries are keyed by the wallpaper fingerprint and the quantizer parameters,
+    so toggling dark mode or the variant reuses the colors of the last run while
+    a new wallpaper, an edited file or different resize settings miss.
+    """
+    def __init__(self, cache_dir: str = CACHE_DIR, max_entries: int = MAX_ENTRIES):
+        self.path = os.path.join(cache_dir, CACHE_FILE)
+        self.max_entries = max_entries
+        self.entries = None
+
+    @staticmethod
+    def make_key(path: str, params: dict) -> str:
+        return file_fingerprint(path) + "|" + json.dumps(params, sort_keys=True)
+
+    def load(self) -> dict:
+        if self.entries is None:
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+                self.entries = data["entries"] if data.get("version") == CACHE_VERSION else {}
+            except (OSError, ValueError, KeyError, AttributeError):
+                self.entries = {}
+        return self.entries
+
+    def save(self):
+        # Write to a temporary file and rename it, so a concurrent run never
+        # reads a half-written cache
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            write_atomic(self.path, json.dumps({"version": CACHE_VERSION, "entries": self.entries}).encode("utf-8"), 0o600)
+        except (OSError, TypeError, ValueError) as e:
+            print("Cannot write source color cache: " + str(e))
+
+    def get(self, key: str):
+        """Ranked colors stored for key, or None on a miss"""
+        entries = self.load()
+        if key not in entries:
+            return None
+        # Dicts keep insertion order, moving a hit to the end keeps the least
+        # recently used entry first. The order is only written with the next
+        # put(), a hit doesn't rewrite the file
+        entries[key] = entries.pop(key)
+        return entries[key]
+
+    def put(self, key: str, colors: list[int]):
+        entries = self.load()
+        entries.pop(key, None)
+        entries[key] = [int(color) for color in colors]
+        while len(entries) > self.max_entries:
+            del entries[next(iter(entries))]
+        self.save()
@@ -0,0 +1,106 @@
+"""Tests of the scan of the theme stylesheets gtk.css is trimmed to
+
+Run from the adwaita-material-you directory: python3 -m unittest
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from css_usage import referenced_names, scan_stylesheets, trim_names
+
+STYLESHEET = """@define-color window_bg_color #fafafa;
+headerbar { background-color: @headerbar_bg_color; color: @headerbar_fg_color; }
+button:checked { background-color: var(--accent-bg-color); }
+.card { border-color: alpha(@blue_3, 0.5); }
+"""
+
+class StylesheetTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.stylesheet = self.write("gtk.css", STYLESHEET)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.dir.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+class ScanStylesheetsTest(StylesheetTestCase):
+    def test_named_colors_and_custom_properties(self):
+        names = scan_stylesheets([self.stylesheet])
+        self.assertTrue({"headerbar_bg_color", "headerbar_fg_color", "blue_3", "accent_bg_color"} <= names)
+        self.assertNotIn("accent-bg-color", names)
+        # Colors the stylesheet defines itself aren't needed from gtk.css
+        self.assertNotIn("window_bg_color", names)
+
+    def test_file_without_colors(self):
+        compressed = self.write("libadwaita-1.so", "\x00\x01compressed resources")
+        self.assertIsNone(scan_stylesheets([self.stylesheet, compressed]))
+
+    def test_no_stylesheet(self):
+        self.assertEqual(scan_stylesheets([]), set())
+
+class ReferencedNamesTest(StylesheetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache_path = os.path.join(self.dir.name, "cache", "css_usage.json")
+
+    def toolkits(self, *patterns):
+        return {"adw-gtk3": [os.path.join(self.dir.name, pattern) for pattern in patterns]}
+
+    def test_scan_is_cached(self):
+        names = referenced_names(self.toolkits("gtk.css"), self.cache_path)
+        self.assertEqual(names, scan_stylesheets([self.stylesheet]))
+        self.assertTrue(os.path.isfile(self.cache_path))
+        # A cache hit doesn't scan the stylesheet again
+        with mock.patch("css_usage.scan_stylesheets", side_effect=AssertionError("scanned again")):
+            self.assertEqual(referenced_names(self.toolkits("gtk.css"), self.cache_path), names)
+
+    def test_changed_stylesheet_is_scanned_again(self):
+        referenced_names(self.toolkits("gtk.css"), self.cache_path)
+        self.write("gtk.css", STYLESHEET + ".sidebar { color: @sidebar_fg_color; }\n")
+        self.assertIn("sidebar_fg_color", referenced_names(self.toolkits("gtk.css"), self.cache_path))
+
+    def test_patterns(self):
+        self.write("gtk-dark.css", "label { color: var(--view-fg-color); }\n")
+        names = referenced_names(self.toolkits("gtk*.css"), self.cache_path)
+        self.assertIn("view_fg_color", names)
+        self.assertIn("headerbar_bg_color", names)
+
+    def test_nothing_matches(self):
+        self.assertIsNone(referenced_names(self.toolkits("missing/*.css"), self.cache_path))
+        self.assertFalse(os.path.exists(self.cache_path))
+
+    def test_every_toolkit_is_needed(self):
+        # adw-gtk3 is installed but libadwaita isn't found, trimming to the
+        # names of adw-gtk3 would drop the colors of libadwaita applications
+        toolkits = {**self.toolkits("gtk.css"), "libadwaita": [os.path.join(self.dir.name, "libadwaita-1.so*")]}
+        self.assertIsNone(referenced_names(toolkits, self.cache_path))
+        self.write("libadwaita-1.so.0", "window { background-color: var(--window-bg-color); }\n")
+        names = referenced_names(toolkits, self.cache_path)
+        self.assertIn("window_bg_color", names)
+        self.assertIn("headerbar_bg_color", names)
+
+    def test_compressed_toolkit_stylesheet(self):
+        # libadwaita keeps its stylesheet compressed in the library
+        self.write("libadwaita-1.so.0", "\x00\x01compressed resources")
+        toolkits = {**self.toolkits("gtk.css"), "libadwaita": [os.path.join(self.dir.name, "libadwaita-1.so*")]}
+        self.assertIsNone(referenced_names(toolkits, self.cache_path))
+
+    def test_untrimmed_is_logged(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            self.assertIsNone(trim_names(self.toolkits("missing/*.css"), self.cache_path))
+        self.assertIn("defines every color", output.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+"""Tests of the writes of generated files and caches
+
+Run from the adwaita-material-you directory: python3 -m unittest
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from output_writer import OutputWriter, write_atomic
+
+class WriteAtomicTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "gtk.css")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_write(self):
+        write_atomic(self.path, b"old", 0o600)
+        write_atomic(self.path, b"new", 0o600)
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"new")
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+        self.assertEqual(os.listdir(self.dir.name), ["gtk.css"])
+
+    def test_failed_write_leaves_no_temporary_file(self):
+        write_atomic(self.path, b"old")
+        with mock.patch("os.replace", side_effect=OSError("read-only")):
+            with self.assertRaises(OSError):
+                write_atomic(self.path, b"new")
+        self.assertEqual(os.listdir(self.dir.name), ["gtk.css"])
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"old")
+
+    def test_unchanged_file_is_skipped(self):
+        writer = OutputWriter()
+        self.assertTrue(writer.write(self.path, "@define-color accent_bg_color #3584e4;\n"))
+        self.assertFalse(writer.write(self.path, "@define-color accent_bg_color #3584e4;\n"))
+        self.assertEqual((writer.touched, writer.skipped), (1, 1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+"""Tests of the cache of the source colors of wallpapers
+
+Run from the adwaita-material-you directory: python3 -m unittest
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from source_color_cache import SourceColorCache
+
+class SourceColorCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_put_and_get(self):
+        SourceColorCache(self.dir.name).put("a", [0xFF4285F4, 0xFFEA4335])
+        self.assertEqual(SourceColorCache(self.dir.name).get("a"), [0xFF4285F4, 0xFFEA4335])
+        self.assertIsNone(SourceColorCache(self.dir.name).get("b"))
+
+    def test_hit_does_not_write(self):
+        cache = SourceColorCache(self.dir.name)
+        cache.put("a", [1])
+        cache.put("b", [2])
+        with mock.patch("source_color_cache.write_atomic", side_effect=AssertionError("written")):
+            self.assertEqual(cache.get("a"), [1])
+
+    def test_least_recently_used_is_evicted(self):
+        cache = SourceColorCache(self.dir.name, max_entries=2)
+        cache.put("a", [1])
+        cache.put("b", [2])
+        cache.get("a")
+        cache.put("c", [3])
+        reloaded = SourceColorCache(self.dir.name, max_entries=2)
+        self.assertIsNone(reloaded.get("b"))
+        self.assertEqual(reloaded.get("a"), [1])
+
+    def test_failed_write_is_reported(self):
+        cache = SourceColorCache(self.dir.name)
+        with mock.patch("source_color_cache.write_atomic", side_effect=OSError("read-only")), mock.patch("builtins.print") as log:
+            cache.put("a", [1])
+        log.assert_called_once()
+        self.assertEqual(os.listdir(self.dir.name), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+from output_writer import OutputWriter
+from source_color_cache import CACHE_DIR
+
+TARGET_GTK3 = "gtk3"
+TARGET_GTK4 = "gtk4"
+TARGET_SHELL = "shell"
+TARGET_ARCMENU = "arcmenu"
+TARGET_PYWAL = "pywal"
+ALL_TARGETS = [TARGET_GTK3, TARGET_GTK4, TARGET_SHELL, TARGET_ARCMENU, TARGET_PYWAL]
+
+GTK_CSS_FILES = {
+    TARGET_GTK3: "~/.config/gtk-3.0/gtk.css",
+    TARGET_GTK4: "~/.config/gtk-4.0/gtk.css",
+}
+GTK4_MARKER_FILE = "~/.config/gtk-4.0/.materialyou"
+SHELL_CSS_FILE = "~/.local/share/themes/MaterialYou/gnome-shell/gnome-shell.css"
+# Placeholders of the compiled shell stylesheets and the variables replacing them
+SHELL_PLACEHOLDERS = {
+    "-st-accent-color": "accent_bg_color",
+    "-st-accent-fg-color": "accent_fg_color",
+}
+# Variables the ArcMenu colors are taken from
+ARCMENU_VARIABLES = ["headerbar_bg_color", "headerbar_fg_color", "accent_bg_color", "accent_fg_color"]
+# Digests of the inputs of the targets that aren't files, to skip them when
+# the inputs didn't change since the last run
+STATE_FILE = os.path.join(CACHE_DIR, "render_state.json")
+
+def gtk_css(base_preset, names=None) -> str:
+    """@define-color rules of the variables and palette colors of a preset
+
+    When names is given, only the colors it contains are defined, see
+    css_usage.referenced_names().
+    """
+    lines = ["@define-color " + key + " " + value + ";\n" for key, value in base_preset["variables"].items() if names is None or key in names]
+    for prefix_key, shades in base_preset["palette"].items():
+        lines += ["@define-color " + prefix_key + key + " " + value + ";\n" for key, value in shades.items() if names is None or prefix_key + key in names]
+    return "".join(lines)
+
+def inputs_digest(*inputs) -> str:
+    return hashlib.blake2b(json.dumps(inputs).encode("utf-8"), digest_size=16).hexdigest()
+
+class Template:
+    """A text split around its placeholders, rendered with a single join"""
+    def __init__(self, text: str, placeholders: dict):
+        self.parts = re.split("(" + "|".join(re.escape(placeholder) for placeholder in sorted(placeholders, key=len, reverse=True)) + ")", text)
+        # Odd parts are placeholders, replaced by the name of their variable
+        for i in range(1, len(self.parts), 2):
+            self.parts[i] = placeholders[self.parts[i]]
+
+    def render(self, variables) -> str:
+        parts = self.parts[:]
+        for i in range(1, len(parts), 2):
+            parts[i] = variables[parts[i]]
+        return "".join(parts)
+
+class ThemeRenderer:
+    """Renders a mapped preset to every configured target in one pass
+
+    The GTK stylesheet is built once and shared by GTK 3 and GTK 4, the shell
+    stylesheet is rendered from its compiled template, and files are written
+    through an OutputWriter, which skips the ones whose content is unchanged.
+    ArcMenu and pywal don't produce files, they run again only when the
+    variables they read changed since the last run.
+
+    The actions of the targets that aren't files are given by the caller:
+    set_arcmenu(variables), run_pywal(background, image, is_dark) and
+    reload_shell(), the last one being called when the shell stylesheet
+    changed. css_names trims the GTK stylesheet to the colors it contains.
+    """
+    def __init__(self, shell_dir: str = None, set_arcmenu=None, run_pywal=None, reload_shell=None, state_path: str = STATE_FILE, css_names=None):
+        self.shell_dir = shell_dir
+        self.css_names = css_names
+        self.set_arcmenu = set_arcmenu
+        self.run_pywal = run_pywal
+        self.reload_shell = reload_shell
+        self.state_path = state_path
+        self.templates = {}
+        self.writer = OutputWriter()
+
+    def shell_template(self, is_dark: bool):
+        path = os.path.join(self.shell_dir, "compiled_shell_dark.scss" if is_dark else "compiled_shell_light.scss")
+        if path not in self.templates:
+            with open(path, "r") as f:
+                self.templates[path] = (path, Template(f.read(), SHELL_PLACEHOLDERS))
+        return self.templates[path]
+
+    def load_state(self) -> dict:
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def render(self, base_preset, is_dark: bool, targets=ALL_TARGETS, wall_path: str = None) -> list[str]:
+        """Renders base_preset to targets, returns the targets that changed"""
+        variables = base_preset["variables"]
+        changed = []
+
+        if TARGET_GTK3 in targets or TARGET_GTK4 in targets:
+            css = gtk_css(base_preset, self.css_names)
+            for target in (TARGET_GTK3, TARGET_GTK4):
+                if target in targets and self.writer.write(GTK_CSS_FILES[target], css):
+                    changed.append(target)
+            if TARGET_GTK4 in targets:
+                self.writer.write(GTK4_MARKER_FILE, "yes")
+
+        if TARGET_SHELL in targets:
+            path, template = self.shell_template(is_dark)
+            if self.writer.write(SHELL_CSS_FILE, template.render(variables)):
+                shutil.copyfile(path + ".map", os.path.expanduser(SHELL_CSS_FILE) + ".map")
+                changed.append(TARGET_SHELL)
+                if self.reload_shell is not None:
+                    self.reload_shell()
+
+        # Only the targets of this call are kept, a target that is disabled
+        # runs again when it is enabled back
+        state = self.load_state()
+        new_state = {}
+        if TARGET_ARCMENU in targets and self.set_arcmenu is not None:
+            new_state[TARGET_ARCMENU] = inputs_digest([variables[key] for key in ARCMENU_VARIABLES])
+            if state.get(TARGET_ARCMENU) != new_state[TARGET_ARCMENU]:
+                self.set_arcmenu(variables)
+                changed.append(TARGET_ARCMENU)
+        if TARGET_PYWAL in targets and self.run_pywal is not None:
+            try:
+                wall_mtime = os.stat(wall_path).st_mtime_ns
+            except (OSError, TypeError):
+                wall_mtime = None
+            new_state[TARGET_PYWAL] = inputs_digest(variables["window_bg_color"], wall_path, wall_mtime, is_dark)
+            if state.get(TARGET_PYWAL) != new_state[TARGET_PYWAL]:
+                self.run_pywal(variables["window_bg_color"], wall_path, is_dark)
+                changed.append(TARGET_PYWAL)
+        if new_state != state:
+            try:
+                OutputWriter().write(self.state_path, json.dumps(new_state))
+            except OSError as e:
+                print("Cannot write render state: " + str(e))
+        return changed
@@ -0,0 +1,70 @@
+from PIL import Image
+import math
+
+# Bitmap side used when no usable resize box is configured, the quantizer never
+# needs more than BITMAP_SIZE * BITMAP_SIZE pixels to find the source color
+BITMAP_SIZE = 128
+
+# Resampling filter and reducing gap for each downscale mode. "speed" lets
+# Image.reduce() do most of the work with integer box averaging, "quality"
+# only reduces down to 3x the target and finishes with a Lanczos pass
+RESAMPLE_MODES = {
+    "speed": (Image.Resampling.BOX, 1.0),
+    "quality": (Image.Resampling.LANCZOS, 3.0),
+}
+
+def calculate_optimal_size (width: int, height: int, bitmap_size: int) -> (int, int):
+    image_area = width * height;
+    bitmap_area = bitmap_size ** 2
+    scale = math.sqrt(bitmap_area/image_area) if image_area > bitmap_area else 1
+    new_width = round(width * scale)
+    new_height = round(height * scale)
+    if new_width == 0:
+        new_width = 1
+    if new_height == 0:
+        new_height = 1
+    return new_width, new_height
+
+def fit_size(width: int, height: int, box_width: int, box_height: int) -> (int, int):
+    """Size of an image scaled to fit in a box keeping its aspect ratio, never upscaled"""
+    scale = min(box_width / width, box_height / height, 1)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+def target_size(width: int, height: int, box_width: int = 0, box_height: int = 0) -> (int, int):
+    """Size to downscale a width x height wallpaper to before quantization
+
+    The resize-width/resize-height box is honored when both sides are positive,
+    otherwise the area is capped at BITMAP_SIZE * BITMAP_SIZE pixels.
+    """
+    if box_width > 0 and box_height > 0:
+        return fit_size(width, height, box_width, box_height)
+    return calculate_optimal_size(width, height, BITMAP_SIZE)
+
+def open_wallpaper(path: str, box_width: int = 0, box_height: int = 0, mode: str = "speed"):
+    """Open a wallpaper, decoding it at the lowest resolution the downscale stage can use
+
+    Image.open() only reads the header, so the decoder can still be told to
+    skip detail before any pixel is materialized. For JPEG, draft() picks the
+    largest DCT scaling (1/2, 1/4 or 1/8) that keeps the image at least as big
+    as requested. Formats without a reduced-resolution decoder (PNG, and WebP
+    in Pillow) ignore it and are decoded at full size.
+    """
+    image = Image.open(path)
+    width, height = target_size(image.width, image.height, box_width, box_height)
+    # Leave room for the reducing gap, so "quality" still resamples from a
+    # bitmap big enough for its filter
+    reducing_gap = RESAMPLE_MODES[mode][1]
+    image.draft(None, (math.ceil(width * reducing_gap), math.ceil(height * reducing_gap)))
+    return image
+
+def downscale(image, box_width: int = 0, box_height: int = 0, mode: str = "speed"):
+    """Downscale a wallpaper into the RGBA bitmap that is fed to the quantizer"""
+    size = target_size(image.width, image.height, box_width, box_height)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+    if size != image.size:
+        resample, reducing_gap = RESAMPLE_MODES[mode]
+        image = image.resize(size, resample, reducing_gap=reducing_gap)
+    if image.mode != "RGBA":
+        image = image.convert("RGBA")
+    return image